@@ -0,0 +1,27 @@
+import os
+import asyncio
+import logging
+import sys
+from TornAPIWrapper import AsyncTornApiWrapper
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Get API key from environment variable
+api_key = os.getenv('TORN_API')
+if not api_key:
+    logging.error("Environment variable TORN_API not set. Please set the TORN_API environment variable.")
+    sys.exit(1)
+
+
+async def main():
+    # Initialize the AsyncTornApiWrapper with the API key
+    async with AsyncTornApiWrapper(api_key=api_key) as taw:
+        # Get Torn City user data for several users concurrently
+        data = await asyncio.gather(*(taw.get_user(user_id) for user_id in (1, 2, 3)))
+
+    # Print the user data
+    print(data)
+
+
+asyncio.run(main())
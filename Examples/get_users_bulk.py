@@ -0,0 +1,21 @@
+import os
+import logging
+import sys
+from TornAPIWrapper import TornApiWrapper
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Get API key from environment variable
+api_key = os.getenv('TORN_API')
+if not api_key:
+    logging.error("Environment variable TORN_API not set. Please set the TORN_API environment variable.")
+    sys.exit(1)
+
+# Initialize the TornApiWrapper with the API key
+taw = TornApiWrapper(api_key=api_key)
+
+# Get Torn City profile data for users 1 to 100, resuming from the checkpoint file if the script is restarted
+for result in taw.get_users(range(1, 101), ["profile"], checkpoint="users_checkpoint.jsonl"):
+    # Print the user data, or the error for this user
+    print(result.input_id, result.data if result.ok else result.error)
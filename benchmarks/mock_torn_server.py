@@ -0,0 +1,179 @@
+"""
+In-process mock of the Torn City API for benchmarks and offline experiments.
+
+Serves the /user, /faction, /company, /market, /torn, /property and /key endpoints with configurable latency,
+payload size and injected errors, and enforces the per-key request limit like the real API (error 5).
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+ENDPOINTS = ("user", "faction", "company", "market", "torn", "property", "key")
+
+# Selections returned when a request doesn't name any, per endpoint
+DEFAULT_SELECTIONS = {
+    "user": "basic",
+    "faction": "basic",
+    "company": "profile",
+    "market": "itemmarket",
+    "torn": "items",
+    "property": "property",
+    "key": "info",
+}
+
+ERROR_MESSAGES = {
+    2: "Incorrect Key",
+    3: "Wrong type",
+    5: "Too many requests",
+    8: "IP block",
+    9: "API disabled",
+    17: "Backend error occurred, please try again.",
+    18: "API key has been paused by the owner.",
+}
+
+
+class MockTornServer:
+    def __init__(self, latency: float = 0.0, payload_size: int = 1024, error_rate: float = 0.0,
+                 error_codes: Iterable[int] = (17,), rate_limit: Optional[int] = 100, period: float = 60.0,
+                 key_errors: Optional[Dict[str, int]] = None, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Mock Torn API server running on a background thread.
+
+        :param latency: Delay in seconds before each response is sent.
+        :param payload_size: Approximate size in bytes of successful response bodies.
+        :param error_rate: Fraction of requests answered with a random error from `error_codes`.
+        :param error_codes: Torn API error codes to inject.
+        :param rate_limit: Requests allowed per key and `period`, answered with error 5 beyond that. None disables
+            enforcement.
+        :param period: Length of the rate limit window in seconds.
+        :param key_errors: Maps API keys to an error code returned for every request with that key.
+        :param seed: Seed of the error injection, so runs are reproducible.
+        :param host: Address to listen on.
+        :param port: Port to listen on. 0 picks a free port.
+        """
+        self.latency = latency
+        self.payload_size = payload_size
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.rate_limit = rate_limit
+        self.period = period
+        self.key_errors = key_errors or {}
+        self.requests = 0
+        self.errors: Dict[int, int] = {}
+        self._random = random.Random(seed)
+        self._request_times: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to assign to `TornApiWrapper.base_url`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockTornServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-torn-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _check_error(self, endpoint: str, api_key: str) -> Optional[int]:
+        """
+        :return: Error code to answer the request with, if any.
+        """
+        if endpoint not in ENDPOINTS:
+            return 3
+        if not api_key:
+            return 2
+        if api_key in self.key_errors:
+            return self.key_errors[api_key]
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                times = self._request_times.setdefault(api_key, deque())
+                while times and times[0] <= now - self.period:
+                    times.popleft()
+                if len(times) >= self.rate_limit:
+                    return 5
+                times.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self._random.choice(self.error_codes)
+        return None
+
+    def _payload(self, endpoint: str, input_id: str, selections: str) -> bytes:
+        body = {"server_time": int(time.time())}
+        if input_id:
+            body[f"{endpoint}_id"] = int(input_id) if input_id.isdigit() else input_id
+        for selection in (selections or DEFAULT_SELECTIONS[endpoint]).split(","):
+            if endpoint == "market" and selection in ("bazaar", "itemmarket"):
+                body[selection] = self._listings(input_id, selection)
+            else:
+                body[selection] = {"name": f"{endpoint} {input_id} {selection}", "value": len(selection)}
+        encoded = json.dumps(body)
+        padding = self.payload_size - len(encoded) - len(',"padding":""')
+        if padding > 0:
+            body["padding"] = "x" * padding
+            encoded = json.dumps(body)
+        return encoded.encode()
+
+    def _listings(self, item_id: str, selection: str) -> list:
+        """
+        :return: Market listings of an item, where the price of one listing changes every `period`.
+        """
+        listings = [{"ID": index + 1, "cost": 1000 + index * 10, "quantity": 1 + index % 3} for index in range(20)]
+        listings[0]["cost"] += int(time.time() / self.period) % 10
+        return listings
+
+    def _respond(self, endpoint: str, input_id: str, query: Dict[str, list]) -> bytes:
+        error_code = self._check_error(endpoint, query.get("key", [""])[0])
+        if error_code is not None:
+            with self._lock:
+                self.errors[error_code] = self.errors.get(error_code, 0) + 1
+            return json.dumps({"error": {"code": error_code,
+                                         "error": ERROR_MESSAGES.get(error_code, "Unknown error")}}).encode()
+        return self._payload(endpoint, input_id, query.get("selections", [""])[0])
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, without this delayed ACKs add ~40 ms per response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                endpoint = parts[0]
+                input_id = parts[1] if len(parts) > 1 else ""
+                body = server._respond(endpoint, input_id, parse_qs(url.query))
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
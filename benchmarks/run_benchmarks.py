@@ -0,0 +1,222 @@
+"""
+Benchmark the synchronous client against the local mock Torn API server.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--requests N] [--output results.json] [--scenario NAME ...]
+
+Prints a JSON report with throughput, p50/p99 latency, client CPU time per request, memory growth and cache
+effectiveness for each scenario. Request sequences and injected errors are seeded, so two runs of the same
+revision make the same requests and only timings differ.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from TornAPIWrapper import TornApiWrapper, Cache, RetryPolicy, SlidingWindowRateLimiter  # noqa: E402
+from TornAPIWrapper.cache import DEFAULT_TTL_RULES  # noqa: E402
+from TornAPIWrapper.rate_limiter import DEFAULT_WINDOW_MARGIN  # noqa: E402
+from mock_torn_server import MockTornServer  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+API_KEY = "benchmark-key"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def max_rss_kb() -> int:
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def make_wrapper(server: MockTornServer, log_directory: str, rate_limit: int = 10 ** 9, period: float = 60.0,
+                 **kwargs) -> TornApiWrapper:
+    wrapper = TornApiWrapper(API_KEY, log_level=logging.WARNING, log_directory=log_directory,
+                             rate_limiter=SlidingWindowRateLimiter(rate_limit, period,
+                                                                   margin=DEFAULT_WINDOW_MARGIN * period / 60),
+                             **kwargs)
+    wrapper.base_url = server.url
+    return wrapper
+
+
+def no_cache() -> Cache:
+    """
+    :return: Cache that expires every entry immediately, including those with endpoint specific TTLs.
+    """
+    return Cache(ttl=0, ttl_rules={rule: 0 for rule in DEFAULT_TTL_RULES})
+
+
+def run_scenario(name: str, server: MockTornServer, wrapper: TornApiWrapper, calls: List[Callable[[], dict]],
+                 trace_memory: bool) -> Dict:
+    """
+    Make the calls one after another on the current thread and summarize them.
+    """
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    rss_before = max_rss_kb()
+    server_requests_before = server.requests
+    latencies = []
+    failures = 0
+
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    for call in calls:
+        call_start = time.perf_counter()
+        try:
+            call()
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - call_start)
+    duration = time.perf_counter() - start
+    cpu = time.thread_time() - cpu_start
+
+    gc.collect()
+    traced_growth = None
+    if trace_memory:
+        traced_growth, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    latencies.sort()
+    cache = wrapper.cache.stats()
+    lookups = cache["hits"] + cache["stale_hits"] + cache["misses"]
+    metrics = wrapper.metrics.snapshot()
+    return {
+        "scenario": name,
+        "calls": len(calls),
+        "failures": failures,
+        "server_requests": server.requests - server_requests_before,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(len(calls) / duration, 1) if duration else None,
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "client_cpu_per_call_us": round(cpu / len(calls) * 1e6, 1) if calls else None,
+        "max_rss_growth_kb": max_rss_kb() - rss_before,
+        "traced_memory_growth_bytes": traced_growth,
+        "cache_hit_ratio": round((cache["hits"] + cache["stale_hits"]) / lookups, 4) if lookups else None,
+        "cache_entries": cache["entries"],
+        "cache_bytes": cache["bytes"],
+        "retries": sum(metrics["torn_api_retries_total"].values()),
+        "errors": metrics["torn_api_errors_total"],
+    }
+
+
+def scenario_uncached(server, log_directory, args):
+    """Unique IDs on every endpoint: every call is a request, measuring the full client overhead."""
+    wrapper = make_wrapper(server, log_directory, cache=no_cache())
+    methods = [wrapper.get_user, wrapper.get_faction, wrapper.get_company, wrapper.get_property]
+    calls = [lambda m=methods[i % len(methods)], i=i: m(i + 1) for i in range(args.requests)]
+    return wrapper, calls
+
+
+def scenario_cached(server, log_directory, args):
+    """Skewed repeated lookups of a small set of users, measuring cache effectiveness."""
+    wrapper = make_wrapper(server, log_directory)
+    rng = random.Random(args.seed)
+    # Roughly Zipf-distributed IDs, a few hot entities and a long tail
+    ids = [int(rng.paretovariate(1.2)) for _ in range(args.requests)]
+    calls = [lambda user_id=user_id: wrapper.get_user(user_id, ["profile"]) for user_id in ids]
+    return wrapper, calls
+
+
+def scenario_large_payload(server, log_directory, args):
+    """Uncached 256 KB responses, e.g. torn?selections=items, measuring decoding cost."""
+    server.payload_size = 256 * 1024
+    wrapper = make_wrapper(server, log_directory, cache=no_cache())
+    calls = [lambda: wrapper.get_torn(selections=["items"]) for _ in range(max(1, args.requests // 10))]
+    return wrapper, calls
+
+
+def scenario_errors(server, log_directory, args):
+    """5% injected backend errors (17), measuring retries."""
+    server.error_rate = 0.05
+    wrapper = make_wrapper(server, log_directory, cache=no_cache(),
+                           retry_policy=RetryPolicy(backoff_base=0.001, backoff_max=0.01))
+    calls = [lambda i=i: wrapper.get_market(i + 1) for i in range(args.requests)]
+    return wrapper, calls
+
+
+def scenario_rate_limited(server, log_directory, args):
+    """
+    Server enforces 100 requests per 1 s window, the real limit scaled down 60 times. The client should stay within
+    it; any error 5 shows up in "errors".
+    """
+    server.rate_limit, server.period = 100, 1.0
+    wrapper = make_wrapper(server, log_directory, rate_limit=100, period=1.0, cache=no_cache(),
+                           retry_policy=RetryPolicy(too_many_requests_delay=1.0))
+    calls = [lambda i=i: wrapper.get_user(i + 1) for i in range(min(args.requests, 300))]
+    return wrapper, calls
+
+
+SCENARIOS = {
+    "uncached": scenario_uncached,
+    "cached": scenario_cached,
+    "large_payload": scenario_large_payload,
+    "errors": scenario_errors,
+    "rate_limited": scenario_rate_limited,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TornApiWrapper against a local mock Torn API.")
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per scenario.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock server latency in seconds.")
+    parser.add_argument("--payload-size", type=int, default=2048, help="Mock response size in bytes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for request sequences and injected errors.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run, may be repeated. Defaults to all.")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Report Python heap growth with tracemalloc. Slows down the run.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        with MockTornServer(latency=args.latency, payload_size=args.payload_size, rate_limit=None,
+                            seed=args.seed) as server, tempfile.TemporaryDirectory() as log_directory:
+            wrapper, calls = SCENARIOS[name](server, log_directory, args)
+            with wrapper:
+                results.append(run_scenario(name, server, wrapper, calls, args.trace_memory))
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "parameters": {"requests": args.requests, "latency": args.latency, "payload_size": args.payload_size,
+                       "seed": args.seed},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
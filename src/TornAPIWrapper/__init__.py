@@ -1,4 +1,63 @@
-from .torn_api_wrapper import TornApiWrapper
-from .torn_api_error_handler import TornApiErrorHandler
+from typing import TYPE_CHECKING
 
-__all__ = ["TornApiWrapper", "TornApiErrorHandler"]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .torn_api_wrapper import TornApiWrapper
+    from .async_torn_api_wrapper import AsyncTornApiWrapper
+    from .torn_api_error_handler import TornApiErrorHandler
+    from .key_pool import KeyPool
+    from .cache import Cache, DiskCache
+    from .metrics import Metrics
+    from .models import Model, UserProfile, Bars, Faction, FactionMember, Market, TornItems
+    from .cassette import Cassette
+    from .retry import RetryPolicy, CircuitBreaker
+    from .rate_limiter import RateLimiter, SlidingWindowRateLimiter, TokenBucketRateLimiter, SQLiteRateLimiter
+    from .shared_context import SharedContext
+    from .snapshot_store import SnapshotStore
+
+# Public names and the modules defining them. Modules are imported on first access, so importing the package
+# doesn't load requests, aiohttp and asyncio before they are needed.
+_EXPORTS = {
+    "TornApiWrapper": "torn_api_wrapper",
+    "AsyncTornApiWrapper": "async_torn_api_wrapper",
+    "TornApiErrorHandler": "torn_api_error_handler",
+    "KeyPool": "key_pool",
+    "Cache": "cache",
+    "DiskCache": "cache",
+    "RateLimiter": "rate_limiter",
+    "SlidingWindowRateLimiter": "rate_limiter",
+    "TokenBucketRateLimiter": "rate_limiter",
+    "SQLiteRateLimiter": "rate_limiter",
+    "RetryPolicy": "retry",
+    "CircuitBreaker": "retry",
+    "Metrics": "metrics",
+    "Cassette": "cassette",
+    "Model": "models",
+    "UserProfile": "models",
+    "Bars": "models",
+    "Faction": "models",
+    "FactionMember": "models",
+    "Market": "models",
+    "TornItems": "models",
+    "SharedContext": "shared_context",
+    "SnapshotStore": "snapshot_store",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
+
+
+__all__ = ["TornApiWrapper", "AsyncTornApiWrapper", "TornApiErrorHandler", "KeyPool", "Cache", "DiskCache",
+           "RateLimiter", "SlidingWindowRateLimiter", "TokenBucketRateLimiter", "SQLiteRateLimiter",
+           "RetryPolicy", "CircuitBreaker", "Metrics", "SharedContext", "SnapshotStore",
+           "Cassette", "Model", "UserProfile", "Bars", "Faction", "FactionMember", "Market", "TornItems"]
\ No newline at end of file
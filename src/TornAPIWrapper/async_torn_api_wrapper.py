@@ -0,0 +1,277 @@
+"""
+MIT License
+
+Copyright (c) 2023-Present cxdzc, dspencej
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from typing import Union, List, Optional
+import logging
+import time
+from .torn_api_error_handler import TornApiErrorHandler, TornApiError
+from .metrics import Metrics
+from .torn_api_wrapper import build_request_params
+from .rate_limiter import AsyncSlidingWindowRateLimiter
+from .cache import Cache, make_cache_key
+from .single_flight import AsyncSingleFlight
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class AsyncTornApiWrapper:
+    """
+    An asyncio wrapper for the Torn City API (https://www.torn.com/api.html), providing access to Torn City data.
+
+    Mirrors the endpoint methods of `TornApiWrapper` as coroutines. Requires the optional `aiohttp` dependency
+    (`pip install tornapiwrapper[async]`).
+    """
+
+    base_url = "https://api.torn.com"
+    request_limit = 100  # Max 100 requests per minute
+
+    def __init__(self, api_key: str, log_level=logging.INFO, cache_ttl=300, max_connections: int = 100,
+                 timeout: float = 30.0, session: Optional["aiohttp.ClientSession"] = None,
+                 metrics: Optional[Metrics] = None):
+        """
+        Initialize the AsyncTornApiWrapper with the provided API key and log level.
+
+        :param api_key: API key used to authenticate API requests.
+        :param log_level: Logging level.
+        :param cache_ttl: Time-to-live for the cache in seconds.
+        :param max_connections: Maximum number of simultaneous connections to the API.
+        :param timeout: Total request timeout in seconds.
+        :param session: Optional preconfigured `aiohttp.ClientSession`. It is used as-is and is not closed by
+            `close()`.
+        :param metrics: Metrics to record requests in. Defaults to a new `Metrics()`, available as `metrics`.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncTornApiWrapper requires aiohttp. Install it with "
+                              "`pip install tornapiwrapper[async]`.")
+
+        self.api_key = api_key
+        self.api_comment = None
+        self.error_handler = TornApiErrorHandler()
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+        self._owns_session = session is None
+        self.session = session
+
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(log_level)
+
+        self.rate_limiter = AsyncSlidingWindowRateLimiter(limit=self.request_limit, period=60)
+        self.cache = Cache(ttl=cache_ttl)
+        self.single_flight = AsyncSingleFlight()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector("cache", self.cache.stats)
+
+        self.logger.info("AsyncTornApiWrapper initialized with provided API key.")
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """
+        Return the HTTP session, creating it on first use so it is bound to the running event loop.
+
+        :return: Client session.
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept": "application/json", "Accept-Encoding": "gzip, deflate"},
+            )
+            self._owns_session = True
+        return self.session
+
+    async def close(self):
+        """
+        Close the HTTP session and release its pooled connections.
+        """
+        if self._owns_session and self.session is not None and not self.session.closed:
+            await self.session.close()
+            self.logger.debug("HTTP session closed.")
+        self.metrics.remove_collector("cache", self.cache.stats)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def api_request(self, endpoint: str, input_id: int = None, selections: List[str] = None,
+                          limit: int = None, sort: str = None, stat: str = None, cat: int = None, log: int = None,
+                          from_unix: int = None, to_unix: int = None, unix_timestamp: int = None) -> dict:
+        """
+        Make a request to the Torn City API.
+
+        :param endpoint: API endpoint.
+        :param input_id: ID input for endpoint.
+        :param selections: List of selections from available fields.
+        :param limit: Limit amount of results.
+        :param sort: Sort results.
+        :param stat: Select a stat to view.
+        :param cat: Filter logs based on the Torn log categories.
+        :param log: Filter logs based on the Torn log types.
+        :param from_unix: UNIX timestamp to filter results, including entries on or after this timestamp.
+        :param to_unix: UNIX timestamp to filter results, including entries on or before this timestamp.
+        :param unix_timestamp: UNIX timestamp to get specific stat from date.
+        :return: Json-encoded data.
+        """
+        query = build_request_params(None, selections, limit, sort, stat, cat, log, from_unix, to_unix,
+                                     unix_timestamp, self.api_comment)
+        cache_key = make_cache_key(endpoint, input_id, query)
+
+        cached_response = self.cache.get(cache_key)
+        if cached_response is not None:
+            self.logger.info("Cache hit. Returning cached response.")
+            return cached_response
+
+        async def load() -> dict:
+            # A previous leader may have stored the data between the cache lookup above and this call
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+            self.logger.info("Making API request to endpoint: %s with input_id: %s", endpoint, input_id)
+            waited = await self.rate_limiter.acquire()
+            self.metrics.record_wait(waited)
+            if waited:
+                self.logger.warning("Request limit reached. Waited %.2fs for a free slot.", waited)
+            url = f"{self.base_url}{endpoint}{'/' + str(input_id) if input_id else ''}"
+            params = dict(query, key=self.api_key)
+
+            start = time.monotonic()
+            async with self._get_session().get(url, params=params) as response:
+                self.logger.info("Received response with status code: %s", response.status)
+                if response.status != 200:
+                    self.metrics.record_error(f"http_{response.status}")
+                    self.error_handler.logger.error("HTTP Error %s: %s", response.status, await response.text())
+                    response.raise_for_status()
+                content = await response.read()
+            self.metrics.record_request(endpoint, time.monotonic() - start, len(content))
+
+            try:
+                response_data = self.error_handler.check_response_content(content)
+            except TornApiError as e:
+                self.metrics.record_error(e.error_code)
+                raise
+            self.cache.set(cache_key, response_data, ttl=self.cache.ttl_for(endpoint, selections), raw=content)
+            return response_data
+
+        # Callers asking for the same data while it is being fetched share the result of one request
+        return await self.single_flight.do(cache_key, load)
+
+    async def get_user(self, user_id: int = None, selections: List[str] = None, limit: int = None,
+                       stat: str = None, cat: int = None, log: int = None, from_unix: int = None,
+                       to_unix: int = None, unix_timestamp: int = None) -> dict:
+        """
+        Get Torn City user data.
+
+        :param user_id: Torn City user ID.
+        :param selections: List of selections from available fields.
+        :param limit: Limit amount of results.
+        :param stat: Select a stat to view.
+        :param cat: Filter based on the log categories.
+        :param log: Filter based on the log types.
+        :param from_unix: UNIX timestamp to filter results, including entries on or after this timestamp.
+        :param to_unix: UNIX timestamp to filter results, including entries on or before this timestamp.
+        :param unix_timestamp: UNIX timestamp to get specific stat from date.
+        :return: Json-encoded Torn City user data.
+        """
+        self.logger.info("Fetching user data for user_id: %s", user_id)
+        return await self.api_request("/user", user_id, selections, limit, sort=None, stat=stat, cat=cat, log=log,
+                                      from_unix=from_unix, to_unix=to_unix, unix_timestamp=unix_timestamp)
+
+    async def get_property(self, property_id: int, selections: List[str] = None) -> dict:
+        """
+        Get Torn City property data.
+
+        :param property_id: Torn City property ID.
+        :param selections: List of selections from available fields.
+        :return: Json-encoded Torn City property data.
+        """
+        self.logger.info("Fetching property data for property_id: %s", property_id)
+        return await self.api_request("/property", property_id, selections)
+
+    async def get_faction(self, faction_id: int = None, selections: List[str] = None, limit: int = None,
+                          sort: str = None, from_unix: int = None, to_unix: int = None) -> dict:
+        """
+        Get Torn City faction data.
+
+        :param faction_id: Torn City faction ID.
+        :param selections: List of selections from available fields.
+        :param limit: Limit amount of results.
+        :param sort: Sort results.
+        :param from_unix: UNIX timestamps to filter results, including entries on or after this timestamp.
+        :param to_unix: UNIX timestamps to filter results, including entries on or before this timestamp.
+        :return: Json-encoded Torn City faction data.
+        """
+        self.logger.info("Fetching faction data for faction_id: %s", faction_id)
+        return await self.api_request("/faction", faction_id, selections, limit, sort, stat=None, cat=None,
+                                      log=None, from_unix=from_unix, to_unix=to_unix, unix_timestamp=None)
+
+    async def get_company(self, company_id: int = None, selections: List[str] = None, limit: int = None,
+                          from_unix: int = None, to_unix: int = None) -> dict:
+        """
+        Get Torn City company data.
+
+        :param company_id: Torn City company ID.
+        :param selections: List of selections from available fields.
+        :param limit: Limit amount of results.
+        :param from_unix: UNIX timestamps to filter results, including entries on or after this timestamp.
+        :param to_unix: UNIX timestamps to filter results, including entries on or before this timestamp.
+        :return: Json-encoded Torn City company data.
+        """
+        self.logger.info("Fetching company data for company_id: %s", company_id)
+        return await self.api_request("/company", company_id, selections, limit, sort=None, stat=None, cat=None,
+                                      log=None, from_unix=from_unix, to_unix=to_unix, unix_timestamp=None)
+
+    async def get_market(self, item_id: int, selections: List[str] = None) -> dict:
+        """
+        Get Torn City market data.
+
+        :param item_id: Torn City item ID.
+        :param selections: List of selections from available fields.
+        :return: Json-encoded Torn City market data.
+        """
+        self.logger.info("Fetching market data for item_id: %s", item_id)
+        return await self.api_request("/market", item_id, selections)
+
+    async def get_torn(self, torn_id: Union[str, int] = None, selections: List[str] = None) -> dict:
+        """
+        Get Torn City data.
+
+        :param torn_id: Torn City ID.
+        :param selections: List of selections from available fields.
+        :return: Json-encoded Torn City data.
+        """
+        self.logger.info("Fetching Torn data for torn_id: %s", torn_id)
+        return await self.api_request("/torn", torn_id, selections)
+
+    async def get_key_info(self) -> dict:
+        """
+        Get Torn City API key data.
+
+        :return: Json-encoded Torn City data.
+        """
+        self.logger.info("Fetching API key information")
+        return await self.api_request("/key", None, ["info"])
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class BulkResult(NamedTuple):
+    """Result of one ID in a bulk fetch. Exactly one of `data` and `error` is set."""
+    input_id: Any
+    data: Optional[dict]
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkCheckpoint:
+    def __init__(self, path: str):
+        """
+        Track the IDs of a bulk fetch that completed successfully, so an interrupted run can resume.
+
+        IDs are appended to a JSON lines file as they complete, so the cost per ID is one small write. A batch of IDs
+        can be recorded together with the position its output was committed up to, in one line, so the output can
+        be cut back to that position when resuming. A line cut short by a crash is ignored.
+
+        :param path: Path to the checkpoint file.
+        """
+        self.path = path
+        self.completed: Set[str] = set()
+        # Position the output was committed up to with the last batch, None if no batch recorded one
+        self.position: Optional[int] = None
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping incomplete line in checkpoint %s.", path)
+                        continue
+                    if isinstance(entry, dict):
+                        self.completed.update(str(input_id) for input_id in entry["ids"])
+                        self.position = entry["position"]
+                    else:
+                        self.completed.add(str(entry))
+        self._file = open(path, "a")
+        # Start on a fresh line after a line cut short, so the next record isn't joined to it
+        if self._file.tell() > 0:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def __contains__(self, input_id) -> bool:
+        return str(input_id) in self.completed
+
+    def mark(self, input_id):
+        """
+        Record an ID as completed.
+
+        :param input_id: The completed ID.
+        """
+        with self._lock:
+            self.completed.add(str(input_id))
+            self._file.write(json.dumps(input_id) + "\n")
+            self._file.flush()
+
+    def mark_batch(self, input_ids: Iterable[Any], position: int):
+        """
+        Record IDs as completed, together with the position their output was committed up to.
+
+        :param input_ids: The completed IDs.
+        :param position: Position of the output after the batch, e.g. its size in bytes.
+        """
+        input_ids = list(input_ids)
+        with self._lock:
+            self.completed.update(str(input_id) for input_id in input_ids)
+            self.position = position
+            # One write per batch, so a crash leaves either the whole batch or a line that is skipped when loading
+            self._file.write(json.dumps({"ids": input_ids, "position": position}) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class BulkFetcher:
+    def __init__(self, fetch: Callable[[Any], dict], max_workers: int = 8, ordered: bool = False,
+                 checkpoint: Optional[str] = None):
+        """
+        Fetch many IDs concurrently on a bounded thread pool.
+
+        Requests still go through the wrapper's rate limiter, so the pool only hides round-trip latency and never
+        exceeds the request budget. At most `2 * max_workers` IDs are in flight, so the ID iterable is consumed
+        lazily and can be arbitrarily large.
+
+        :param fetch: Callable fetching the data for one ID.
+        :param max_workers: Number of worker threads.
+        :param ordered: Whether to yield results in input order instead of as they complete.
+        :param checkpoint: Optional path to a checkpoint file. IDs completed in earlier runs are skipped.
+        """
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.ordered = ordered
+        # Opened by `run`, which also closes it
+        self.checkpoint_path = checkpoint
+
+    def _run_one(self, input_id) -> BulkResult:
+        try:
+            data = self.fetch(input_id)
+        except Exception as e:
+            logger.warning("Bulk fetch of ID %s failed: %s", input_id, e)
+            return BulkResult(input_id, None, e)
+        return BulkResult(input_id, data, None)
+
+    def run(self, input_ids: Iterable[Any]) -> Iterator[BulkResult]:
+        """
+        Fetch all IDs, yielding a `BulkResult` for each. Errors are reported per ID and don't stop the batch.
+
+        With a checkpoint, an ID is marked as completed once its result has been handed to the caller, so results
+        still in flight when the iteration stops are fetched again by the next run.
+
+        :param input_ids: IDs to fetch.
+        :return: Iterator of results.
+        """
+        checkpoint = BulkCheckpoint(self.checkpoint_path) if self.checkpoint_path else None
+        max_in_flight = 2 * self.max_workers
+        pending_ids = (i for i in input_ids if checkpoint is None or i not in checkpoint)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="torn-api-bulk") as executor:
+                in_flight = deque()
+                for input_id in pending_ids:
+                    in_flight.append(executor.submit(self._run_one, input_id))
+                    if len(in_flight) >= max_in_flight:
+                        yield from self._drain(in_flight, max_in_flight - 1, checkpoint)
+                yield from self._drain(in_flight, 0, checkpoint)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def _drain(self, in_flight: "deque[Future]", until: int,
+               checkpoint: Optional[BulkCheckpoint]) -> Iterator[BulkResult]:
+        while len(in_flight) > until:
+            if self.ordered:
+                yield from self._deliver(in_flight.popleft().result(), checkpoint)
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    yield from self._deliver(future.result(), checkpoint)
+
+    @staticmethod
+    def _deliver(result: BulkResult, checkpoint: Optional[BulkCheckpoint]) -> Iterator[BulkResult]:
+        try:
+            yield result
+        finally:
+            # Reached once the caller has the result, also when it stops iterating right after it
+            if checkpoint is not None and result.ok:
+                checkpoint.mark(result.input_id)
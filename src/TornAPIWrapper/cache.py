@@ -1,15 +1,266 @@
+import heapq
+import sqlite3
+import sys
+import threading
 import time
+from collections import OrderedDict
+from typing import AbstractSet, Any, Dict, List, Mapping, Optional, Tuple
+from . import json_codec
+
+# Request parameters that don't change the response and are left out of cache keys
+IGNORED_KEY_PARAMS = ("key", "comment")
+
+# Default time-to-live in seconds per endpoint or "endpoint/selection". The most specific rule wins and a request
+# for several selections uses the shortest time-to-live among them.
+DEFAULT_TTL_RULES: Dict[str, float] = {
+    "torn/items": 6 * 3600,
+    "torn/companies": 6 * 3600,
+    "torn/education": 6 * 3600,
+    "torn/honors": 6 * 3600,
+    "torn/medals": 6 * 3600,
+    "torn/properties": 6 * 3600,
+    "torn/stocks": 60,
+    "market": 30,
+    "user/bars": 10,
+    "user/cooldowns": 10,
+    "user/notifications": 10,
+    "user/travel": 10,
+    "user/money": 30,
+    "faction/chain": 10,
+    "key/info": 3600,
+}
+
+# Endpoints or "endpoint/selection"s whose response is the same whichever API key requests it. Selections of the
+# user, faction, company and property endpoints are only public with an explicit ID, since without one the API
+# answers for the key's owner.
+DEFAULT_PUBLIC_SELECTIONS = frozenset({
+    "torn",
+    "market",
+    "user/basic",
+    "user/profile",
+    "user/discord",
+    "user/display",
+    "user/bazaar",
+    "faction/basic",
+    "faction/territory",
+    "faction/rankedwars",
+    "company/profile",
+    "property/property",
+})
+
+
+def make_cache_key(endpoint: str, input_id: Any = None, params: Mapping[str, Any] = None) -> str:
+    """
+    Build a canonical cache key from all parameters of a request.
+
+    Selections are sorted and parameters are ordered by name, so equivalent requests share one key. The API key
+    and comment are left out.
+
+    :param endpoint: API endpoint, with or without a leading slash.
+    :param input_id: ID input for endpoint.
+    :param params: Query parameters of the request.
+    :return: Cache key.
+    """
+    parts = []
+    for name, value in sorted((params or {}).items()):
+        if name in IGNORED_KEY_PARAMS or value is None:
+            continue
+        if name == "selections":
+            value = ",".join(sorted(str(value).split(",")))
+        parts.append(f"{name}={value}")
+    path = endpoint.strip("/")
+    if input_id:
+        path = f"{path}/{input_id}"
+    return f"{path}?{'&'.join(parts)}"
+
+
+def is_public_request(endpoint: str, input_id: Any = None, selections: List[str] = None,
+                      public_selections: AbstractSet[str] = DEFAULT_PUBLIC_SELECTIONS) -> bool:
+    """
+    Classify a request as public, so its response can be shared by all keys, or private to the key making it.
+
+    A request is public only if every selection is. Requests without selections get the endpoint's default and
+    are public only if the whole endpoint is.
+
+    :param endpoint: API endpoint, with or without a leading slash.
+    :param input_id: ID input for endpoint.
+    :param selections: List of selections from available fields.
+    :param public_selections: Public endpoints and "endpoint/selection"s.
+    :return: Whether the response doesn't depend on the API key.
+    """
+    endpoint = endpoint.strip("/")
+    if endpoint in public_selections:
+        return True
+    if not input_id or not selections:
+        return False
+    return all(f"{endpoint}/{selection}" in public_selections for selection in selections)
+
+
+class CacheEntry:
+    __slots__ = ("value", "expires", "ttl", "size", "hits")
+
+    def __init__(self, value: Any, expires: float, ttl: float, size: int):
+        self.value = value
+        self.expires = expires
+        self.ttl = ttl
+        self.size = size
+        self.hits = 0
+
+    def is_stale(self, now: float = None) -> bool:
+        """
+        :param now: Current UNIX time, defaults to `time.time()`.
+        :return: Whether the entry's time-to-live has passed.
+        """
+        return (time.time() if now is None else now) >= self.expires
+
+
+class DiskCache:
+    def __init__(self, path: str, min_ttl: float = 60, purge_interval: int = 1000):
+        """
+        Initialize an on-disk cache tier that stores raw response bytes in a SQLite database.
+
+        The database runs in WAL mode, so several processes on the same host can share it. It keeps slow-changing
+        data such as `torn/items` across restarts.
+
+        :param path: Path to the SQLite database file.
+        :param min_ttl: Entries with a shorter time-to-live than this are not written to disk.
+        :param purge_interval: Number of writes between purges of expired rows.
+        """
+        self.path = path
+        self.min_ttl = min_ttl
+        self.purge_interval = purge_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS entries "
+                                 "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)")
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Retrieve raw bytes from the disk cache.
+
+        :param key: The key to look up.
+        :return: Tuple of the raw bytes and their expiry time, or None if not found or expired.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT value, expires FROM entries WHERE key = ? AND expires > ?",
+                                           (key, time.time())).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def set(self, key: str, raw: bytes, expires: float):
+        """
+        Store raw bytes in the disk cache.
+
+        :param key: The key under which to store the bytes.
+        :param raw: Raw response bytes.
+        :param expires: UNIX timestamp after which the entry expires.
+        """
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                                     (key, raw, expires))
+            self._writes += 1
+            if self._writes % self.purge_interval == 0:
+                self._connection.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        """
+        Remove an entry from the disk cache.
+
+        :param key: The key to remove.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        """
+        Remove all entries from the disk cache.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM entries")
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
 
 
 class Cache:
-    def __init__(self, ttl=300):
+    def __init__(self, ttl=300, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_rules: Dict[str, float] = None, disk_cache: Optional[DiskCache] = None, stale_ttl: float = 0):
         """
-        Initialize the Cache with a time-to-live (TTL) value.
+        Initialize a bounded LRU cache with a time-to-live (TTL) value.
 
-        :param ttl: Time-to-live in seconds.
+        :param ttl: Default time-to-live in seconds.
+        :param max_entries: Maximum number of entries. The least recently used entries are evicted first.
+        :param max_bytes: Approximate maximum size of all cached values in bytes.
+        :param ttl_rules: Time-to-live overrides per endpoint or "endpoint/selection", merged over
+            `DEFAULT_TTL_RULES`.
+        :param disk_cache: Optional on-disk second tier. It is read when a key is missing from memory and written
+            for values stored with their raw bytes.
+        :param stale_ttl: How long in seconds expired entries are kept so they can still be served with
+            `get_entry(key, allow_stale=True)` while they are refreshed.
         """
         self.ttl = ttl  # Cache time-to-live in seconds
-        self.cache = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_rules = dict(DEFAULT_TTL_RULES)
+        if ttl_rules:
+            self.ttl_rules.update(ttl_rules)
+        self.disk_cache = disk_cache
+        self.stale_ttl = stale_ttl
+
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.current_bytes = 0
+        self._expiry_heap = []
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, endpoint: str, selections: List[str] = None) -> float:
+        """
+        Look up the time-to-live for a request.
+
+        :param endpoint: API endpoint, with or without a leading slash.
+        :param selections: List of selections from available fields.
+        :return: Time-to-live in seconds.
+        """
+        endpoint = endpoint.strip("/")
+        endpoint_ttl = self.ttl_rules.get(endpoint, self.ttl)
+        if not selections:
+            return endpoint_ttl
+        return min(self.ttl_rules.get(f"{endpoint}/{selection}", endpoint_ttl) for selection in selections)
+
+    def _remove(self, key: str):
+        entry = self.cache.pop(key)
+        self.current_bytes -= entry.size
+
+    def _expire(self, now: float):
+        """
+        Drop entries whose time-to-live and stale period have passed. Each entry is pushed onto the heap once per
+        `set`, so the sweep costs amortized O(log n) per write.
+        """
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            removal, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # Skip heap items left behind by entries that were overwritten or evicted
+            if entry is not None and entry.expires + self.stale_ttl == removal:
+                self._remove(key)
+                self.expirations += 1
+        # Rebuild the heap if stale items pile up
+        if len(heap) > 2 * len(self.cache) + 64:
+            self._expiry_heap = [(entry.expires + self.stale_ttl, key) for key, entry in self.cache.items()]
+            heapq.heapify(self._expiry_heap)
 
     def get(self, key):
         """
@@ -18,19 +269,118 @@ class Cache:
         :param key: The key to look up in the cache.
         :return: The cached value or None if not found or expired.
         """
-        if key in self.cache:
-            entry = self.cache[key]
-            if time.time() - entry['time'] < self.ttl:
-                return entry['value']
-            else:
-                del self.cache[key]
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def get_entry(self, key, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        Retrieve an entry from the cache, falling back to the disk tier on a miss.
+
+        :param key: The key to look up in the cache.
+        :param allow_stale: Whether to return an expired entry that is still within `stale_ttl`.
+        :return: The cache entry or None if not found or expired.
+        """
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                now = time.time()
+                if now < entry.expires or (allow_stale and now < entry.expires + self.stale_ttl):
+                    self.cache.move_to_end(key)
+                    entry.hits += 1
+                    if now < entry.expires:
+                        self.hits += 1
+                    else:
+                        self.stale_hits += 1
+                    return entry
+                if now >= entry.expires + self.stale_ttl:
+                    self._remove(key)
+                    self.expirations += 1
+
+        if self.disk_cache is not None:
+            stored = self.disk_cache.get(key)
+            if stored is not None:
+                raw, expires = stored
+                value = json_codec.loads(raw)
+                with self._lock:
+                    entry = self._store(key, value, expires, expires - time.time(), len(raw))
+                    self.disk_hits += 1
+                return entry
+
+        with self._lock:
+            self.misses += 1
         return None
 
-    def set(self, key, value):
+    def _store(self, key, value, expires: float, ttl: float, size: int) -> CacheEntry:
+        if key in self.cache:
+            self._remove(key)
+        entry = self.cache[key] = CacheEntry(value, expires, ttl, size)
+        self.current_bytes += size
+        heapq.heappush(self._expiry_heap, (expires + self.stale_ttl, key))
+
+        self._expire(time.time())
+        while self.cache and (len(self.cache) > self.max_entries or self.current_bytes > self.max_bytes):
+            oldest_key = next(iter(self.cache))
+            self._remove(oldest_key)
+            self.evictions += 1
+        return entry
+
+    def set(self, key, value, ttl: Optional[float] = None, size: Optional[int] = None, raw: Optional[bytes] = None):
         """
         Store a value in the cache.
 
         :param key: The key under which to store the value.
         :param value: The value to store in the cache.
+        :param ttl: Time-to-live in seconds, defaults to the cache's `ttl`.
+        :param size: Size of the value in bytes, e.g. the length of the raw response. Estimated if not given.
+        :param raw: Raw response bytes the value was decoded from. Required for the value to reach the disk tier.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl
+        if size is None:
+            size = len(raw) if raw is not None else sys.getsizeof(value)
+        with self._lock:
+            self._store(key, value, expires, ttl, size)
+        if self.disk_cache is not None and raw is not None and ttl >= self.disk_cache.min_ttl:
+            self.disk_cache.set(key, raw, expires)
+
+    def delete(self, key):
+        """
+        Remove a value from the cache.
+
+        :param key: The key to remove.
+        """
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+        if self.disk_cache is not None:
+            self.disk_cache.delete(key)
+
+    def clear(self):
+        """
+        Remove all values from the cache, including the disk tier.
+        """
+        with self._lock:
+            self.cache.clear()
+            self._expiry_heap = []
+            self.current_bytes = 0
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Hit, miss, eviction and expiration counters and the current size of the cache.
         """
-        self.cache[key] = {'value': value, 'time': time.time()}
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self.cache),
+                "bytes": self.current_bytes,
+            }
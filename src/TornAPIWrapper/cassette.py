@@ -0,0 +1,160 @@
+import gzip
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from .cache import IGNORED_KEY_PARAMS
+
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+MODES = (RECORD, REPLAY, AUTO)
+
+# Response headers kept in recordings, everything else is dropped to keep cassettes small
+RECORDED_HEADERS = ("Content-Type", "Retry-After")
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode for a request that isn't in the cassette."""
+
+
+def request_key(url: str) -> str:
+    """
+    Build the canonical lookup key of a request: its path and sorted query, without the API key and comment.
+
+    :param url: Full request URL including the query string.
+    :return: Key identifying the request independently of the host and API key.
+    """
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in IGNORED_KEY_PARAMS)
+    return f"{parts.path}?{urlencode(query)}" if query else parts.path
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = AUTO):
+        """
+        Recorded API responses, stored as JSON lines (gzip compressed if `path` ends with ".gz").
+
+        Requests are looked up by `request_key`, so recordings never contain API keys and replay with any key.
+        A request recorded several times replays its responses in order and then keeps returning the last one.
+
+        :param path: Path to the cassette file.
+        :param mode: "record" sends every request and writes the responses to a new cassette, "replay" never
+            touches the network and raises `CassetteMissError` for unknown requests, "auto" replays known requests
+            and records the rest.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}.")
+        self.path = path
+        self.mode = mode
+        self.interactions: Dict[str, List[dict]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if mode != RECORD and os.path.exists(path):
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        """Whether requests are answered from the cassette only, so rate limits and retry delays can be skipped."""
+        return self.mode == REPLAY
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self):
+        with self._open("r") as file:
+            for line in file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self.interactions.setdefault(interaction["request"], []).append(interaction)
+
+    def play(self, key: str) -> Optional[dict]:
+        """
+        :param key: Request key from `request_key`.
+        :return: Next recorded interaction for the request, or None if it was never recorded.
+        """
+        with self._lock:
+            interactions = self.interactions.get(key)
+            if not interactions:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return interactions[min(position, len(interactions) - 1)]
+
+    def record(self, key: str, response: requests.Response):
+        """
+        Append a response to the cassette file.
+
+        :param key: Request key from `request_key`.
+        :param response: Response received for the request.
+        """
+        interaction = {
+            "request": key,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            "body": response.content.decode("utf-8", errors="replace"),
+        }
+        with self._lock:
+            self.interactions.setdefault(key, []).append(interaction)
+            if self._file is None:
+                self._file = self._open("w" if self.mode == RECORD else "a")
+            self._file.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CassetteAdapter(BaseAdapter):
+    def __init__(self, cassette: Cassette, adapter: Optional[BaseAdapter] = None):
+        """
+        Transport adapter serving requests from a cassette and recording what it forwards.
+
+        Mounted on the wrapper's session, so everything above the transport, such as caching, retries and error
+        handling, behaves the same as against the live API.
+
+        :param cassette: Cassette to replay from and record to.
+        :param adapter: Adapter that sends requests over the network. Defaults to a new `HTTPAdapter`.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter if adapter is not None else HTTPAdapter()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = request_key(request.url)
+        if self.cassette.mode != RECORD:
+            interaction = self.cassette.play(key)
+            if interaction is not None:
+                return self._build_response(request, interaction)
+            if self.cassette.mode == REPLAY:
+                raise CassetteMissError(f"No recorded response for {key} in {self.cassette.path}.")
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(key, response)
+        return response
+
+    @staticmethod
+    def _build_response(request: requests.PreparedRequest, interaction: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = interaction["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "OK" if response.status_code == 200 else "Recorded"
+        return response
+
+    def close(self):
+        self.adapter.close()
+        self.cassette.close()
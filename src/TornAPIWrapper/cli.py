@@ -0,0 +1,458 @@
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from . import json_codec
+from .bulk import BulkCheckpoint
+from .cache import Cache, DEFAULT_TTL_RULES
+from .snapshot_store import flatten
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ("user", "faction", "company", "market", "property", "torn")
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+# Rows written before the checkpoint is updated, per format. Parquet writes one file per batch.
+DEFAULT_BATCH_SIZES = {"jsonl": 100, "csv": 100, "parquet": 10000}
+
+
+def flatten_row(row: dict) -> Dict[str, Any]:
+    """
+    :param row: Row with nested dicts.
+    :return: Row with dotted field names. Lists are encoded as JSON strings.
+    """
+    return {field: json_codec.dumps(value).decode() if isinstance(value, list) else value
+            for field, value in flatten(row)}
+
+
+class JsonLinesSink:
+    def __init__(self, path: str, append: bool = False, position: Optional[int] = None):
+        """
+        Write rows as JSON lines.
+
+        :param path: Output file.
+        :param append: Whether to add to an existing file, when resuming.
+        :param position: Size in bytes the file had at the last checkpointed commit, when resuming. Rows written
+            after it are cut off, so they aren't repeated.
+        """
+        self._file = open(path, "ab" if append else "wb")
+        if append and position is not None:
+            self._file.truncate(position)
+
+    def write(self, row: dict):
+        self._file.write(json_codec.dumps(row) + b"\n")
+
+    def commit(self) -> int:
+        """
+        Make the rows written so far durable, before their IDs are checkpointed.
+
+        :return: Size of the file in bytes, to resume from.
+        """
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    def __init__(self, path: str, append: bool = False, position: Optional[int] = None):
+        """
+        Write flattened rows as CSV.
+
+        The columns are taken from the rows of the first batch, or from the header when resuming. Fields that only
+        show up later are left out, with a warning.
+
+        :param path: Output file.
+        :param append: Whether to add to an existing file, when resuming.
+        :param position: Size in bytes the file had at the last checkpointed commit, when resuming. Rows written
+            after it are cut off, so they aren't repeated.
+        """
+        self.fieldnames: Optional[List[str]] = None
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r", newline="", encoding="utf-8") as file:
+                self.fieldnames = next(csv.reader(file), None)
+        self._file: TextIO = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        if append and position is not None:
+            self._file.truncate(position)
+        self._writer: Optional[csv.DictWriter] = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._dropped = set()
+        if self.fieldnames:
+            self._writer = csv.DictWriter(self._file, self.fieldnames, extrasaction="ignore")
+
+    def write(self, row: dict):
+        row = flatten_row(row)
+        if self._writer is None:
+            self._buffer.append(row)
+            return
+        extra = row.keys() - self._writer.fieldnames
+        if extra - self._dropped:
+            logger.warning("Fields missing from the CSV header are left out: %s", ", ".join(sorted(extra)))
+            self._dropped.update(extra)
+        self._writer.writerow(row)
+
+    def commit(self) -> int:
+        """
+        :return: Size of the file in bytes, to resume from.
+        """
+        if self._writer is None and self._buffer:
+            fieldnames = {}
+            for row in self._buffer:
+                fieldnames.update(dict.fromkeys(row))
+            self._writer = csv.DictWriter(self._file, list(fieldnames), extrasaction="ignore")
+            self._writer.writeheader()
+            self._writer.writerows(self._buffer)
+            self._buffer = []
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self):
+        self.commit()
+        self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path: str, append: bool = False, position: Optional[int] = None):
+        """
+        Write flattened rows as a directory of Parquet files, one per batch, e.g. "part-00000.parquet".
+
+        A Parquet file is only readable once it is complete, so rows are buffered until `commit` writes them out.
+        All parts share the schema of the first one, so the directory reads as one dataset. Fields that only show
+        up later are left out, and values that don't fit their column's type are written as nulls, with a warning.
+
+        :param path: Output directory.
+        :param append: Whether to add files to an existing directory, when resuming.
+        :param position: Number of parts at the last checkpointed commit, when resuming. Later parts are removed,
+            so their rows aren't repeated.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow. Install it with "
+                              "`pip install tornapiwrapper[parquet]`.") from None
+        self._pyarrow = pyarrow
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        parts = sorted(name for name in os.listdir(path) if name.startswith("part-") and name.endswith(".parquet"))
+        if parts and not append:
+            raise FileExistsError(f"{path} already holds Parquet files.")
+        if position is not None:
+            for name in parts[position:]:
+                os.remove(os.path.join(path, name))
+            parts = parts[:position]
+        self._part = len(parts)
+        self.schema = pyarrow.parquet.read_schema(os.path.join(path, parts[0])) if parts else None
+        self._buffer: List[Dict[str, Any]] = []
+        self._dropped = set()
+
+    def write(self, row: dict):
+        self._buffer.append(flatten_row(row))
+
+    def _column(self, values: List[Any], field_type=None):
+        """
+        :param values: Values of one field.
+        :param field_type: Type of the column, inferred from the values if not given.
+        :return: Array of the values, or None if they don't fit the type.
+        """
+        pyarrow = self._pyarrow
+        try:
+            column = pyarrow.array(values)
+            if field_type is None:
+                # Columns without any value have no type yet, strings can hold whatever comes later
+                return column.cast(pyarrow.string()) if pyarrow.types.is_null(column.type) else column
+            return column.cast(field_type)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+            if field_type is None or pyarrow.types.is_string(field_type):
+                return pyarrow.array([None if value is None else str(value) for value in values], pyarrow.string())
+            return None
+
+    def _table(self):
+        """
+        :return: Table of the buffered rows, in the schema of the parts.
+        """
+        pyarrow = self._pyarrow
+        names = {}
+        for row in self._buffer:
+            names.update(dict.fromkeys(row))
+        if self.schema is None:
+            columns = [self._column([row.get(name) for row in self._buffer]) for name in names]
+            self.schema = pyarrow.schema([pyarrow.field(name, column.type) for name, column in zip(names, columns)])
+            return pyarrow.Table.from_arrays(columns, schema=self.schema)
+
+        extra = names.keys() - set(self.schema.names)
+        if extra - self._dropped:
+            logger.warning("Fields missing from the Parquet schema are left out: %s", ", ".join(sorted(extra)))
+            self._dropped.update(extra)
+        columns = []
+        for field in self.schema:
+            column = self._column([row.get(field.name) for row in self._buffer], field.type)
+            if column is None:
+                logger.warning("Values of field %s don't fit its type %s and are left out of part %d.",
+                               field.name, field.type, self._part)
+                column = pyarrow.nulls(len(self._buffer), field.type)
+            columns.append(column)
+        return pyarrow.Table.from_arrays(columns, schema=self.schema)
+
+    def commit(self) -> int:
+        """
+        :return: Number of parts written, to resume from.
+        """
+        if not self._buffer:
+            return self._part
+        table = self._table()
+        part_path = os.path.join(self.path, f"part-{self._part:05d}.parquet")
+        # Write under a temporary name, so an interrupted run never leaves a partial part behind
+        self._pyarrow.parquet.write_table(table, part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+        self._part += 1
+        self._buffer = []
+        return self._part
+
+    def close(self):
+        self.commit()
+
+
+SINKS = {"jsonl": JsonLinesSink, "csv": CsvSink, "parquet": ParquetSink}
+
+
+def infer_format(output: str) -> str:
+    """
+    :param output: Output path.
+    :return: Output format matching the path's extension, Parquet for anything else.
+    """
+    extension = os.path.splitext(output)[1].lower()
+    if extension in (".jsonl", ".json", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    return "parquet"
+
+
+def parse_range(value: str) -> range:
+    """
+    :param value: Inclusive range such as "1-1000".
+    :return: The range of IDs.
+    """
+    start, separator, stop = value.partition("-")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Expected a range like 1-1000, got {value!r}.")
+    return range(int(start), int(stop) + 1)
+
+
+def parse_ids(value: str) -> List[int]:
+    """
+    :param value: Comma-separated IDs.
+    :return: List of IDs.
+    """
+    return [int(input_id) for input_id in value.split(",") if input_id.strip()]
+
+
+def read_ids(path: str) -> Iterator[int]:
+    """
+    :param path: File with one ID per line, or "-" for standard input. Blank lines and lines starting with "#" are
+        skipped.
+    :return: Iterator of IDs, read lazily.
+    """
+    file = sys.stdin if path == "-" else open(path, "r")
+    try:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield int(line)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def faction_member_ids(taw, faction_ids: Iterable[int]) -> Iterator[int]:
+    """
+    :param taw: `TornApiWrapper` used to fetch the factions.
+    :param faction_ids: Faction IDs.
+    :return: Iterator of the IDs of the factions' members, fetching one faction at a time.
+    """
+    for faction_id in faction_ids:
+        members = taw.get_faction(faction_id, ["basic"]).get("members") or {}
+        for member_id in members:
+            yield int(member_id)
+
+
+class Progress:
+    def __init__(self, total: Optional[int], stream: TextIO = sys.stderr, interval: float = 0.5):
+        """
+        Live progress line with throughput and estimated time remaining.
+
+        :param total: Number of IDs to fetch in this run, if known.
+        :param stream: Stream to write the line to.
+        :param interval: Minimum time in seconds between two updates.
+        """
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.start = time.monotonic()
+        self._last_update = 0.0
+
+    def update(self, ok: bool, force: bool = False):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if force or now - self._last_update >= self.interval:
+            self._last_update = now
+            self.stream.write("\r" + self.line(now))
+            self.stream.flush()
+
+    def line(self, now: Optional[float] = None) -> str:
+        elapsed = max((time.monotonic() if now is None else now) - self.start, 1e-9)
+        finished = self.done + self.failed
+        rate = finished / elapsed
+        line = f"{self.done} done, {self.failed} failed"
+        if self.total:
+            line = f"{finished}/{self.total} ({100 * finished / self.total:.1f}%) - " + line
+        line += f", {rate:.1f}/s"
+        if self.total and rate > 0:
+            remaining = max(self.total - finished, 0) / rate
+            line += f", ETA {int(remaining // 3600):d}:{int(remaining % 3600 // 60):02d}:{int(remaining % 60):02d}"
+        return line
+
+    def finish(self):
+        self.stream.write("\r" + self.line() + "\n")
+        self.stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="torn-export",
+        description="Fetch an endpoint for many IDs within the request budget and stream the responses to a "
+                    "JSON lines, CSV or Parquet file. Interrupted exports resume from a checkpoint.")
+    parser.add_argument("endpoint", choices=ENDPOINTS, help="API endpoint to fetch.")
+    ids = parser.add_mutually_exclusive_group(required=True)
+    ids.add_argument("--ids", type=parse_ids, help="Comma-separated IDs.")
+    ids.add_argument("--range", type=parse_range, help="Inclusive ID range, e.g. 1-1000.")
+    ids.add_argument("--ids-file", help="File with one ID per line, - for standard input.")
+    ids.add_argument("--faction-members", type=parse_ids, metavar="FACTION_IDS",
+                     help="Comma-separated faction IDs whose members are fetched.")
+    parser.add_argument("-s", "--selections", default="",
+                        help="Comma-separated selections, e.g. profile,personalstats.")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Output file, or directory for Parquet. The format follows the extension.")
+    parser.add_argument("-f", "--format", choices=FORMATS, help="Output format, overriding the extension.")
+    parser.add_argument("-k", "--key", default=os.getenv("TORN_API"),
+                        help="API key, or comma-separated keys to spread requests over. Defaults to $TORN_API.")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Number of requests in flight at once.")
+    parser.add_argument("--checkpoint", help="Checkpoint file, defaults to the output path with .checkpoint added.")
+    parser.add_argument("--batch-size", type=int,
+                        help="Rows per checkpoint update, and per file for Parquet. Defaults to 100, or 10000 for "
+                             "Parquet.")
+    parser.add_argument("--log-directory", help="Directory for the request log shared with other processes.")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level, e.g. INFO.")
+    parser.add_argument("--no-progress", action="store_true", help="Don't print the progress line.")
+    return parser
+
+
+def id_source(args: argparse.Namespace, taw) -> Tuple[Iterable[int], Optional[int]]:
+    """
+    :return: Tuple of the IDs to export and their number, if known without reading them all.
+    """
+    if args.ids is not None:
+        return args.ids, len(args.ids)
+    if args.range is not None:
+        return args.range, len(args.range)
+    if args.ids_file is not None:
+        total = None
+        if args.ids_file != "-":
+            total = sum(1 for _ in read_ids(args.ids_file))
+        return read_ids(args.ids_file), total
+    return faction_member_ids(taw, args.faction_members), None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `torn-export` command.
+
+    :param argv: Command-line arguments, defaults to `sys.argv[1:]`.
+    :return: Exit code: 0 if every ID was exported, 1 if some failed, 2 for invalid arguments.
+    """
+    args = build_parser().parse_args(argv)
+    if not args.key:
+        print("No API key given. Pass --key or set the TORN_API environment variable.", file=sys.stderr)
+        return 2
+    log_level = getattr(logging, args.log_level.upper(), logging.WARNING)
+    output_format = args.format or infer_format(args.output)
+    batch_size = args.batch_size or DEFAULT_BATCH_SIZES[output_format]
+    checkpoint_path = args.checkpoint or args.output.rstrip("/\\") + ".checkpoint"
+    selections = [selection for selection in args.selections.split(",") if selection] or None
+    keys = [key.strip() for key in args.key.split(",") if key.strip()]
+
+    from .torn_api_wrapper import TornApiWrapper
+
+    checkpoint = BulkCheckpoint(checkpoint_path)
+    resuming = len(checkpoint.completed) > 0
+    try:
+        sink = SINKS[output_format](args.output, append=resuming, position=checkpoint.position)
+    except (ImportError, OSError) as e:
+        checkpoint.close()
+        print(e, file=sys.stderr)
+        return 2
+    progress = None
+    failed = 0
+    # IDs are checkpointed together with the output position once their rows are committed. Rows written after the
+    # last checkpoint are cut off when resuming, so a resumed run never loses or repeats rows.
+    uncommitted = []
+
+    def commit():
+        position = sink.commit()
+        if uncommitted:
+            checkpoint.mark_batch(uncommitted, position)
+            uncommitted.clear()
+
+    # Every response is used once, so the cache only has to hold the requests in flight
+    cache = Cache(ttl=0, ttl_rules={rule: 0 for rule in DEFAULT_TTL_RULES})
+    try:
+        with TornApiWrapper(keys[0] if len(keys) == 1 else keys, log_level=log_level,
+                            log_directory=args.log_directory, cache=cache) as taw:
+            input_ids, total = id_source(args, taw)
+            if resuming:
+                logger.warning("Resuming, skipping %d IDs exported before.", len(checkpoint.completed))
+                if total is not None:
+                    total = max(total - len(checkpoint.completed), 0)
+            pending_ids = (input_id for input_id in input_ids if input_id not in checkpoint)
+            progress = None if args.no_progress else Progress(total)
+
+            for result in taw.bulk_request(f"/{args.endpoint}", pending_ids, selections, max_workers=args.workers):
+                if result.ok:
+                    sink.write({"input_id": result.input_id, **result.data})
+                    uncommitted.append(result.input_id)
+                    if len(uncommitted) >= batch_size:
+                        commit()
+                else:
+                    failed += 1
+                    logger.warning("Exporting ID %s failed: %s", result.input_id, result.error)
+                if progress is not None:
+                    progress.update(result.ok)
+    except KeyboardInterrupt:
+        print("\nInterrupted, run the same command again to resume.", file=sys.stderr)
+        return 130
+    finally:
+        commit()
+        sink.close()
+        checkpoint.close()
+        if progress is not None:
+            progress.finish()
+    if failed:
+        print(f"{failed} IDs failed and were not checkpointed, run the same command again to retry them.",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from .torn_api_error_handler import TornApiError
+
+# Errors caused by a selection of the request: wrong fields, access level of key is not high enough
+SELECTION_ERROR_CODES = frozenset({4, 16})
+
+# Top-level response fields per (endpoint, selection). Used to hand each caller of a coalesced request only the
+# part it asked for. Callers asking for a selection not listed here receive the full merged response.
+SELECTION_FIELDS: Dict[Tuple[str, str], FrozenSet[str]] = {
+    ("user", "bars"): frozenset({"server_time", "happy", "life", "energy", "nerve", "chain"}),
+    ("user", "cooldowns"): frozenset({"cooldowns"}),
+    ("user", "travel"): frozenset({"travel"}),
+    ("user", "money"): frozenset({"points", "cayman_bank", "vault_amount", "company_funds", "daily_networth",
+                                  "money_onhand", "city_bank"}),
+    ("user", "battlestats"): frozenset({"strength", "speed", "dexterity", "defense", "total", "strength_modifier",
+                                        "defense_modifier", "speed_modifier", "dexterity_modifier",
+                                        "strength_info", "defense_info", "speed_info", "dexterity_info"}),
+    ("user", "notifications"): frozenset({"notifications"}),
+    ("user", "icons"): frozenset({"icons"}),
+    ("user", "personalstats"): frozenset({"personalstats"}),
+    ("user", "profile"): frozenset({"rank", "level", "honor", "gender", "property", "signup", "awards", "friends",
+                                    "enemies", "forum_posts", "karma", "age", "role", "donator", "player_id", "name",
+                                    "property_id", "revivable", "profile_image", "life", "status", "job", "faction",
+                                    "married", "basicicons", "states", "last_action", "competition"}),
+    ("faction", "basic"): frozenset({"ID", "name", "tag", "tag_image", "leader", "co-leader", "respect", "age",
+                                     "capacity", "best_chain", "ranked_wars", "territory_wars", "raid_wars", "peace",
+                                     "members"}),
+    ("faction", "chain"): frozenset({"chain"}),
+    ("market", "bazaar"): frozenset({"bazaar"}),
+    ("market", "itemmarket"): frozenset({"itemmarket"}),
+}
+
+
+class _Batch:
+    def __init__(self):
+        self.selections = set()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SelectionCoalescer:
+    def __init__(self, fetch: Callable[[str, Any, List[str]], dict], window: float = 0.05,
+                 selection_fields: Dict[Tuple[str, str], FrozenSet[str]] = None):
+        """
+        Merge concurrent requests for the same entity into one request with the union of their selections.
+
+        The first caller for an (endpoint, ID) pair opens a batch and waits `window` seconds. Callers arriving
+        in that time join the batch. The first caller then makes one request for all selections and every caller
+        receives the part of the response that belongs to its own selections.
+
+        :param fetch: Callable making the request, taking the endpoint, ID and list of selections.
+        :param window: Time in seconds a batch stays open for other callers to join.
+        :param selection_fields: Optional overrides for the top-level fields per (endpoint, selection).
+        """
+        self.fetch = fetch
+        self.window = window
+        self.selection_fields = dict(SELECTION_FIELDS)
+        if selection_fields:
+            self.selection_fields.update(selection_fields)
+        self._pending: Dict[Tuple[str, Any], _Batch] = {}
+        self._lock = threading.Lock()
+        self.requests_saved = 0
+
+    def request(self, endpoint: str, input_id: Any, selections: List[str]) -> dict:
+        """
+        Request selections for an entity, sharing the request with other callers in the same window.
+
+        :param endpoint: API endpoint.
+        :param input_id: ID input for endpoint.
+        :param selections: List of selections from available fields.
+        :return: Json-encoded data for the requested selections.
+        :raises TornApiError: If the merged request fails, every caller in the batch receives the error. If it
+            failed because of a selection, each caller makes its own request instead, so only callers asking for
+            that selection fail.
+        """
+        batch_key = (endpoint, input_id)
+        with self._lock:
+            batch = self._pending.get(batch_key)
+            leader = batch is None
+            if leader:
+                batch = self._pending[batch_key] = _Batch()
+            else:
+                self.requests_saved += 1
+            batch.selections.update(selections)
+
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                # Close the batch, later callers open a new one
+                del self._pending[batch_key]
+            try:
+                batch.result = self.fetch(endpoint, input_id, sorted(batch.selections))
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            if (isinstance(batch.error, TornApiError) and batch.error.error_code in SELECTION_ERROR_CODES
+                    and batch.selections != set(selections)):
+                # Another caller's selection may have failed the merged request
+                return self.fetch(endpoint, input_id, selections)
+            raise batch.error
+        if batch.selections == set(selections):
+            return batch.result
+        return self.project(endpoint, batch.result, selections)
+
+    def project(self, endpoint: str, data: dict, selections: List[str]) -> dict:
+        """
+        Pick the fields that belong to the given selections out of a merged response.
+
+        :param endpoint: API endpoint.
+        :param data: Merged Json-encoded data.
+        :param selections: List of selections to keep.
+        :return: Json-encoded data for the selections, or the merged data if a selection's fields are unknown.
+        """
+        endpoint = endpoint.strip("/")
+        fields = set()
+        for selection in selections:
+            selection_fields: Optional[FrozenSet[str]] = self.selection_fields.get((endpoint, selection))
+            if selection_fields is None:
+                return data
+            fields.update(selection_fields)
+        return {field: value for field, value in data.items() if field in fields}
@@ -0,0 +1,34 @@
+import logging
+from typing import Optional
+from colorama import Fore, Style
+
+# Console color per log level
+LEVEL_COLORS = {
+    logging.DEBUG: Fore.GREEN,
+    logging.INFO: Fore.MAGENTA,
+    logging.WARNING: Fore.YELLOW,
+    logging.ERROR: Fore.RED,
+    logging.CRITICAL: Fore.RED + Style.BRIGHT,
+}
+
+
+class ColorFormatter(logging.Formatter):
+    """Formatter that colors each record by its level. Colors are added only to records that are emitted."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        color = LEVEL_COLORS.get(record.levelno)
+        return color + message + Style.RESET_ALL if color else message
+
+
+def enable_color_logging(logger: Optional[logging.Logger] = None):
+    """
+    Switch the handlers of a logger to `ColorFormatter`, keeping their format strings.
+
+    :param logger: Logger whose handlers to color. Defaults to the root logger set up by `logging.basicConfig`.
+    """
+    logger = logger if logger is not None else logging.getLogger()
+    for handler in logger.handlers:
+        formatter = handler.formatter
+        handler.setFormatter(ColorFormatter(formatter._fmt if formatter else None,
+                                            formatter.datefmt if formatter else None))
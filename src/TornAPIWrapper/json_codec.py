@@ -0,0 +1,34 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Name of the JSON library in use, "orjson" if installed, otherwise "json"
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """
+    Decode JSON with orjson if it is installed, falling back to the standard library.
+
+    :param content: JSON document, preferably the raw response bytes so no intermediate string is built.
+    :return: Decoded data.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode data as compact JSON bytes.
+
+    :param data: Data to encode.
+    :return: JSON document as UTF-8 bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
@@ -0,0 +1,208 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from .rate_limiter import DEFAULT_WINDOW_MARGIN, RateLimiter, SlidingWindowRateLimiter
+
+# Torn key access levels as reported by `get_key_info()["access_level"]`
+ACCESS_PUBLIC = 1
+ACCESS_MINIMAL = 2
+ACCESS_LIMITED = 3
+ACCESS_FULL = 4
+
+# Minimum access level required by private selections, keyed by (endpoint, selection). Selections not listed
+# here are treated as public. Extend or override per pool with `KeyPool(selection_access_levels=...)`.
+SELECTION_ACCESS_LEVELS: Dict[Tuple[str, str], int] = {
+    ("user", "bars"): ACCESS_MINIMAL,
+    ("user", "cooldowns"): ACCESS_MINIMAL,
+    ("user", "education"): ACCESS_MINIMAL,
+    ("user", "icons"): ACCESS_MINIMAL,
+    ("user", "money"): ACCESS_MINIMAL,
+    ("user", "notifications"): ACCESS_MINIMAL,
+    ("user", "perks"): ACCESS_MINIMAL,
+    ("user", "refills"): ACCESS_MINIMAL,
+    ("user", "travel"): ACCESS_MINIMAL,
+    ("user", "battlestats"): ACCESS_LIMITED,
+    ("user", "attacks"): ACCESS_LIMITED,
+    ("user", "attacksfull"): ACCESS_LIMITED,
+    ("user", "events"): ACCESS_LIMITED,
+    ("user", "inventory"): ACCESS_LIMITED,
+    ("user", "messages"): ACCESS_LIMITED,
+    ("user", "revives"): ACCESS_LIMITED,
+    ("user", "revivesfull"): ACCESS_LIMITED,
+    ("user", "log"): ACCESS_FULL,
+    ("faction", "armorynews"): ACCESS_LIMITED,
+    ("faction", "attacks"): ACCESS_LIMITED,
+    ("faction", "attacksfull"): ACCESS_LIMITED,
+    ("faction", "crimes"): ACCESS_LIMITED,
+    ("faction", "donations"): ACCESS_LIMITED,
+    ("faction", "fundsnews"): ACCESS_LIMITED,
+    ("faction", "mainnews"): ACCESS_LIMITED,
+    ("faction", "revives"): ACCESS_LIMITED,
+    ("faction", "revivesfull"): ACCESS_LIMITED,
+    ("company", "detailed"): ACCESS_LIMITED,
+    ("company", "news"): ACCESS_LIMITED,
+    ("company", "stock"): ACCESS_LIMITED,
+}
+
+# How long a key is benched after an error that is specific to that key, in seconds
+BENCH_DURATIONS: Dict[int, float] = {
+    5: 60,  # Too many requests
+    10: 3600,  # Owner in federal jail
+    13: 6 * 3600,  # Owner inactive
+    14: 3600,  # Daily read limit reached
+    18: 3600,  # Paused by owner
+}
+
+
+class KeyPoolExhaustedError(Exception):
+    """Raised when no key in the pool can serve a request."""
+
+
+class PooledKey:
+    def __init__(self, api_key: str, rate_limiter: RateLimiter, access_level: int = ACCESS_FULL):
+        """
+        A single API key tracked by a `KeyPool`.
+
+        :param api_key: API key.
+        :param rate_limiter: Rate limiter enforcing this key's request budget.
+        :param access_level: Access level of the key (1 public, 2 minimal, 3 limited, 4 full).
+        """
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.access_level = access_level
+        self.benched_until = 0.0
+        self.last_error_code = None
+
+    def __repr__(self):
+        return f"PooledKey(...{self.api_key[-4:]}, access_level={self.access_level})"
+
+
+class KeyPool:
+    def __init__(self, api_keys: Iterable[Union[str, Tuple[str, int]]], request_limit: int = 100,
+                 period: float = 60.0, selection_access_levels: Dict[Tuple[str, str], int] = None,
+                 rate_limiter_factory: Callable[[str], RateLimiter] = None):
+        """
+        Initialize a pool of API keys that spreads requests across all of them.
+
+        Each key gets its own sliding-window budget of `request_limit` requests per `period` seconds. Requests go
+        to the least loaded key that has the required access level and is not benched.
+
+        :param api_keys: API keys, either as plain strings (assumed full access) or `(key, access_level)` tuples.
+        :param request_limit: Maximum number of requests per key within the window.
+        :param period: Length of the window in seconds.
+        :param selection_access_levels: Optional overrides for the required access level per (endpoint, selection).
+        :param rate_limiter_factory: Optional callable creating the rate limiter for a key. Defaults to a sliding
+            window of `request_limit` requests per `period` seconds.
+        """
+        self.request_limit = request_limit
+        self.period = period
+        if rate_limiter_factory is None:
+            def rate_limiter_factory(_api_key: str) -> RateLimiter:
+                return SlidingWindowRateLimiter(limit=request_limit, period=period)
+
+        self.keys: List[PooledKey] = []
+        for api_key in api_keys:
+            api_key, access_level = api_key if isinstance(api_key, tuple) else (api_key, ACCESS_FULL)
+            self.keys.append(PooledKey(api_key, rate_limiter_factory(api_key), access_level))
+        if not self.keys:
+            raise ValueError("KeyPool requires at least one API key.")
+
+        self.selection_access_levels = dict(SELECTION_ACCESS_LEVELS)
+        if selection_access_levels:
+            self.selection_access_levels.update(selection_access_levels)
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def required_access_level(self, endpoint: str, selections: List[str] = None) -> int:
+        """
+        Determine the minimum key access level needed for a request.
+
+        :param endpoint: API endpoint, with or without a leading slash.
+        :param selections: List of selections from available fields.
+        :return: Required access level.
+        """
+        endpoint = endpoint.strip("/")
+        levels = [self.selection_access_levels.get((endpoint, selection), ACCESS_PUBLIC)
+                  for selection in selections or []]
+        return max(levels, default=ACCESS_PUBLIC)
+
+    def acquire(self, min_access_level: int = ACCESS_PUBLIC, timeout: Optional[float] = None) -> PooledKey:
+        """
+        Claim a request slot on the least loaded eligible key, waiting for one to free up if needed.
+
+        :param min_access_level: Minimum access level the key must have.
+        :param timeout: Maximum time in seconds to wait. `None` waits as long as needed.
+        :return: The key to use for the request.
+        :raises KeyPoolExhaustedError: If no key has the access level, all eligible keys are benched for longer than
+            one window, or no slot frees up before the timeout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            eligible = [k for k in self.keys if k.access_level >= min_access_level]
+            if not eligible:
+                raise KeyPoolExhaustedError(f"No key in the pool has access level {min_access_level} or higher.")
+
+            while True:
+                now = time.time()
+                best = None
+                best_available = 0
+                next_free = None
+                for pooled_key in eligible:
+                    if pooled_key.benched_until > now:
+                        free_in = pooled_key.benched_until - now
+                    else:
+                        available = pooled_key.rate_limiter.available()
+                        if available > best_available:
+                            best, best_available = pooled_key, available
+                        free_in = pooled_key.rate_limiter.wait_time()
+                    if next_free is None or free_in < next_free:
+                        next_free = free_in
+
+                # Another thread may have used the slot since it was counted, in which case look again
+                if best is not None and best.rate_limiter.try_acquire():
+                    return best
+
+                if next_free > self.period + DEFAULT_WINDOW_MARGIN:
+                    # Only long benches are left, don't block the caller for hours
+                    raise KeyPoolExhaustedError("All eligible keys in the pool are benched.")
+                if deadline is not None and now + next_free > deadline:
+                    raise KeyPoolExhaustedError("No key in the pool has a free request slot.")
+                self._condition.wait(next_free)
+
+    def report_error(self, pooled_key: PooledKey, error_code: int) -> bool:
+        """
+        Report an API error for a key, benching it if the error is specific to that key.
+
+        :param pooled_key: The key that received the error.
+        :param error_code: Torn API error code.
+        :return: True if the key was benched.
+        """
+        pooled_key.last_error_code = error_code
+        duration = BENCH_DURATIONS.get(error_code)
+        if duration is None:
+            return False
+        with self._condition:
+            pooled_key.benched_until = time.time() + duration
+            self._condition.notify_all()
+        return True
+
+    def set_access_level(self, api_key: str, access_level: int):
+        """
+        Update the access level of a key, e.g. from `get_key_info()["access_level"]`.
+
+        :param api_key: API key.
+        :param access_level: New access level.
+        """
+        with self._condition:
+            for pooled_key in self.keys:
+                if pooled_key.api_key == api_key:
+                    pooled_key.access_level = access_level
+
+    def available_keys(self) -> List[PooledKey]:
+        """
+        :return: Keys that are currently not benched.
+        """
+        now = time.time()
+        return [k for k in self.keys if k.benched_until <= now]
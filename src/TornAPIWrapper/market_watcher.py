@@ -0,0 +1,275 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+DEFAULT_MARKET_SELECTIONS = ("bazaar", "itemmarket")
+
+# Listing key (source, listing ID, occurrence) to (cost, quantity)
+ListingIndex = Dict[Tuple[str, Any, int], Tuple[int, int]]
+
+
+class MarketDelta(NamedTuple):
+    """One change of a market listing between two polls."""
+    item_id: int
+    kind: str  # "added", "removed" or "changed"
+    source: str  # "bazaar" or "itemmarket"
+    listing_id: Any
+    cost: Optional[int]
+    quantity: Optional[int]
+    previous_cost: Optional[int] = None
+    previous_quantity: Optional[int] = None
+
+
+def index_listings(data: dict, selections: Iterable[str] = DEFAULT_MARKET_SELECTIONS) -> ListingIndex:
+    """
+    Index the listings of a market response by source and listing ID.
+
+    :param data: Response of `get_market`.
+    :param selections: Listing selections to index.
+    :return: Dict of (source, listing ID, occurrence) to (cost, quantity). The occurrence tells apart listings
+        sharing an ID, e.g. a seller with several bazaar prices.
+    """
+    index: ListingIndex = {}
+    for source in selections:
+        listings = data.get(source) or ()
+        if isinstance(listings, dict):
+            listings = listings.values()
+        seen: Dict[Any, int] = {}
+        for listing in listings:
+            listing_id = listing.get("ID")
+            occurrence = seen[listing_id] = seen.get(listing_id, -1) + 1
+            index[(source, listing_id, occurrence)] = (listing.get("cost"), listing.get("quantity"))
+    return index
+
+
+def diff_listings(item_id: int, previous: ListingIndex, current: ListingIndex) -> List[MarketDelta]:
+    """
+    Compute the changes between two listing indexes.
+
+    Unchanged markets are detected with one dict comparison, and the changed entries are found with set
+    operations on the item views, so the Python-level work is proportional to the number of changes.
+
+    :param item_id: Item the listings belong to.
+    :param previous: Index of the previous poll.
+    :param current: Index of the current poll.
+    :return: List of deltas.
+    """
+    if previous == current:
+        return []
+    deltas = []
+    for key, (cost, quantity) in current.items() - previous.items():
+        source, listing_id, _ = key
+        old = previous.get(key)
+        if old is None:
+            deltas.append(MarketDelta(item_id, ADDED, source, listing_id, cost, quantity))
+        else:
+            deltas.append(MarketDelta(item_id, CHANGED, source, listing_id, cost, quantity, old[0], old[1]))
+    for key in previous.keys() - current.keys():
+        source, listing_id, _ = key
+        cost, quantity = previous[key]
+        deltas.append(MarketDelta(item_id, REMOVED, source, listing_id, None, None, cost, quantity))
+    return deltas
+
+
+class MarketWatcher:
+    def __init__(self, fetch: Callable[[int, List[str]], dict], item_ids: Iterable[int], interval: float = 60.0,
+                 selections: Iterable[str] = DEFAULT_MARKET_SELECTIONS, max_rate: Optional[float] = None,
+                 callbacks: Iterable[Callable[[MarketDelta], None]] = ()):
+        """
+        Poll market listings of many items and emit only what changed since the previous poll.
+
+        The last snapshot of each item is kept as a `ListingIndex`, see `diff_listings`. Items are polled
+        round-robin, no more often than every `interval` seconds each, and spaced so the watcher makes at most
+        `max_rate` requests per minute. Usually created with `TornApiWrapper.watch_markets`.
+
+        :param fetch: Callable fetching the market data of an item, taking the item ID and selections.
+        :param item_ids: Items to watch.
+        :param interval: Minimum time in seconds between two polls of the same item.
+        :param selections: Listing selections to watch.
+        :param max_rate: Maximum requests per minute the watcher may use. Unlimited if None.
+        :param callbacks: Callables receiving each delta, called on the polling thread.
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.selections = list(selections)
+        self.max_rate = max_rate
+        self.callbacks: List[Callable[[MarketDelta], None]] = list(callbacks)
+        self.snapshots: Dict[int, ListingIndex] = {}
+        self.watched = set()
+        self.polls = 0
+        self.errors = 0
+
+        self._due: List[Tuple[float, int]] = []
+        self._queues: List[Tuple[Callable[[Optional[MarketDelta]], None], Any]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for item_id in item_ids:
+            self.add_item(item_id)
+
+    def add_item(self, item_id: int):
+        """
+        Start watching an item. Its first poll only records a snapshot and emits no deltas.
+        """
+        with self._lock:
+            if item_id not in self.watched:
+                self.watched.add(item_id)
+                heapq.heappush(self._due, (time.monotonic(), item_id))
+
+    def remove_item(self, item_id: int):
+        """
+        Stop watching an item and forget its snapshot.
+        """
+        with self._lock:
+            self.watched.discard(item_id)
+            self._due = [(due, due_id) for due, due_id in self._due if due_id != item_id]
+            heapq.heapify(self._due)
+            self.snapshots.pop(item_id, None)
+
+    def poll(self, item_id: int) -> List[MarketDelta]:
+        """
+        Fetch an item's listings now, update its snapshot and emit the deltas.
+
+        :param item_id: Item to poll.
+        :return: Deltas since the previous poll, empty on the first poll.
+        """
+        current = index_listings(self.fetch(item_id, self.selections), self.selections)
+        previous = self.snapshots.get(item_id)
+        self.snapshots[item_id] = current
+        self.polls += 1
+        if previous is None:
+            return []
+        deltas = diff_listings(item_id, previous, current)
+        for delta in deltas:
+            self._emit(delta)
+        return deltas
+
+    def _emit(self, delta: Optional[MarketDelta]):
+        if delta is not None:
+            for callback in self.callbacks:
+                try:
+                    callback(delta)
+                except Exception as e:
+                    logger.warning("Market watcher callback failed: %s", e)
+        with self._lock:
+            consumers = list(self._queues)
+        for put, _ in consumers:
+            put(delta)
+
+    def _run(self):
+        spacing = 60.0 / self.max_rate if self.max_rate else 0.0
+        next_request = time.monotonic()
+        while not self._stop.is_set():
+            with self._lock:
+                ready = max(self._due[0][0], next_request) if self._due else None
+                now = time.monotonic()
+                item_id = heapq.heappop(self._due)[1] if ready is not None and ready <= now else None
+            if item_id is None:
+                # Wake up at least once a second to notice newly added items
+                self._stop.wait(min(ready - now, 1.0) if ready is not None else 1.0)
+                continue
+
+            next_request = now + spacing
+            try:
+                self.poll(item_id)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Polling market of item %s failed: %s", item_id, e)
+            with self._lock:
+                if item_id in self.watched:
+                    heapq.heappush(self._due, (now + self.interval, item_id))
+        self._emit(None)
+
+    def start(self) -> "MarketWatcher":
+        """
+        Start polling on a background thread.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="torn-api-market-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop polling. Iterators returned by `deltas()` and `adeltas()` end.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _subscribe(self, put: Callable[[Optional[MarketDelta]], None]):
+        token = (put, object())
+        with self._lock:
+            self._queues.append(token)
+        return token
+
+    def _unsubscribe(self, token):
+        with self._lock:
+            if token in self._queues:
+                self._queues.remove(token)
+
+    def deltas(self) -> Iterator[MarketDelta]:
+        """
+        :return: Iterator of deltas found from now on, ending when the watcher stops. Deltas are collected from
+            the moment of this call, even before iteration starts.
+        """
+        deltas: "queue.Queue[Optional[MarketDelta]]" = queue.Queue()
+        token = self._subscribe(deltas.put)
+
+        def iterate() -> Iterator[MarketDelta]:
+            try:
+                while True:
+                    delta = deltas.get()
+                    if delta is None:
+                        return
+                    yield delta
+            finally:
+                self._unsubscribe(token)
+
+        iterator = iterate()
+        # Also unsubscribe when the iterator is dropped without ever being started
+        weakref.finalize(iterator, self._unsubscribe, token)
+        return iterator
+
+    def adeltas(self):
+        """
+        Async iterator of deltas found from now on, ending when the watcher stops. Must be called on the event
+        loop that iterates it. Polling still happens on the watcher's thread, deltas are handed over to the loop.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        deltas: "asyncio.Queue[Optional[MarketDelta]]" = asyncio.Queue()
+        token = self._subscribe(lambda delta: loop.call_soon_threadsafe(deltas.put_nowait, delta))
+
+        async def iterate():
+            try:
+                while True:
+                    delta = await deltas.get()
+                    if delta is None:
+                        return
+                    yield delta
+            finally:
+                self._unsubscribe(token)
+
+        iterator = iterate()
+        weakref.finalize(iterator, self._unsubscribe, token)
+        return iterator
@@ -0,0 +1,286 @@
+import bisect
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Upper bounds in seconds of the request latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds in seconds of the rate limiter wait histogram buckets
+DEFAULT_WAIT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0)
+
+# Called with the metric name, the observed value and the labels of every observation
+MetricsHook = Callable[[str, float, Dict[str, str]], None]
+
+
+def _format_labels(label_names: Sequence[str], labels: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    __slots__ = ("name", "help", "label_names", "values", "_lock")
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        """
+        Monotonic counter, optionally split by labels.
+
+        :param name: Metric name.
+        :param help: Description of the metric.
+        :param label_names: Names of the labels the counter is split by.
+        """
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), value: float = 1):
+        """
+        :param labels: Label values, in the order of `label_names`.
+        :param value: Amount to add.
+        """
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {",".join(labels): value for labels, value in self.values.items()}
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in self.values.items():
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    __slots__ = ("name", "help", "label_names", "buckets", "series", "_lock")
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Histogram with fixed buckets, optionally split by labels. Observing a value is a binary search and a few
+        additions, so it is cheap enough for every request.
+
+        :param name: Metric name.
+        :param help: Description of the metric.
+        :param label_names: Names of the labels the histogram is split by.
+        :param buckets: Sorted upper bounds of the buckets. A +Inf bucket is always added.
+        """
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Per label values: [bucket counts..., +Inf count, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        """
+        :param value: Observed value.
+        :param labels: Label values, in the order of `label_names`.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def quantile(self, q: float, labels: Tuple[str, ...] = ()) -> Optional[float]:
+        """
+        Estimate a quantile from the buckets, interpolating linearly inside the bucket it falls in.
+
+        :param q: Quantile between 0 and 1, e.g. 0.99.
+        :param labels: Label values.
+        :return: Estimated value, or None if nothing was observed.
+        """
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                return None
+            counts = series[:-1]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self.series.items()]
+        for labels, series in items:
+            count = sum(series[:-1])
+            result[",".join(labels)] = {
+                "count": count,
+                "sum": series[-1],
+                "mean": series[-1] / count if count else 0.0,
+                "p50": self.quantile(0.5, labels),
+                "p99": self.quantile(0.99, labels),
+            }
+        return result
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self.series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="{}"'.format("+Inf" if bound == float("inf") else _format_number(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_number(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Metrics:
+    def __init__(self, latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+                 wait_buckets: Sequence[float] = DEFAULT_WAIT_BUCKETS):
+        """
+        Counters and histograms describing the requests made by a wrapper.
+
+        Request latency and bytes received are split by endpoint, errors and retries by error code. Torn API errors
+        use their numeric code, transport errors a name such as "http_503", "timeout" or "connection". Cache
+        statistics are read from the cache when exporting, so they cost nothing per request.
+
+        :param latency_buckets: Upper bounds in seconds of the request latency buckets.
+        :param wait_buckets: Upper bounds in seconds of the rate limiter wait buckets.
+        """
+        self.request_latency = Histogram("torn_api_request_latency_seconds", "Time to receive an API response.",
+                                         ("endpoint",), latency_buckets)
+        self.response_bytes = Counter("torn_api_response_bytes_total", "Bytes received in response bodies.",
+                                      ("endpoint",))
+        self.rate_limit_wait = Histogram("torn_api_rate_limit_wait_seconds",
+                                         "Time spent waiting for a request slot.", (), wait_buckets)
+        self.errors = Counter("torn_api_errors_total", "Failed requests by error code.", ("code",))
+        self.retries = Counter("torn_api_retries_total", "Retried requests by error code.", ("code",))
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+        self._hooks: List[MetricsHook] = []
+
+    def add_hook(self, hook: MetricsHook):
+        """
+        Forward every observation to a callable, e.g. to feed a StatsD or OpenTelemetry client.
+
+        :param hook: Callable taking the metric name, the value and a dict of labels.
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: MetricsHook):
+        self._hooks.remove(hook)
+
+    def add_collector(self, prefix: str, collect: Callable[[], Dict[str, float]]):
+        """
+        Export values read on demand, such as `Cache.stats`. Values of collectors sharing a prefix are summed, so
+        wrappers sharing a `Metrics` instance report the totals of their caches.
+
+        :param prefix: Name inserted into the metric names, e.g. "cache" for `torn_api_cache_hits`.
+        :param collect: Callable returning a dict of metric names to values.
+        """
+        self._collectors.append((prefix, collect))
+
+    def remove_collector(self, prefix: str, collect: Callable[[], Dict[str, float]]):
+        """
+        Stop exporting the values of a collector, e.g. when the wrapper owning a cache is closed.
+
+        :param prefix: Prefix the collector was added with.
+        :param collect: Callable the collector was added with.
+        """
+        if (prefix, collect) in self._collectors:
+            self._collectors.remove((prefix, collect))
+
+    def _emit(self, name: str, value: float, labels: Dict[str, str]):
+        for hook in self._hooks:
+            hook(name, value, labels)
+
+    def record_request(self, endpoint: str, latency: float, size: int):
+        """
+        :param endpoint: API endpoint.
+        :param latency: Time in seconds until the response was received.
+        :param size: Size of the response body in bytes.
+        """
+        self.request_latency.observe(latency, (endpoint,))
+        self.response_bytes.inc((endpoint,), size)
+        if self._hooks:
+            self._emit(self.request_latency.name, latency, {"endpoint": endpoint})
+            self._emit(self.response_bytes.name, size, {"endpoint": endpoint})
+
+    def record_wait(self, seconds: float):
+        """
+        :param seconds: Time in seconds spent waiting for a request slot.
+        """
+        self.rate_limit_wait.observe(seconds)
+        if self._hooks:
+            self._emit(self.rate_limit_wait.name, seconds, {})
+
+    def record_error(self, code: Union[int, str]):
+        """
+        :param code: Torn API error code, or a transport error name such as "http_503".
+        """
+        self.errors.inc((str(code),))
+        if self._hooks:
+            self._emit(self.errors.name, 1, {"code": str(code)})
+
+    def record_retry(self, code: Union[int, str]):
+        """
+        :param code: Error code of the failure that is retried.
+        """
+        self.retries.inc((str(code),))
+        if self._hooks:
+            self._emit(self.retries.name, 1, {"code": str(code)})
+
+    def _collected(self) -> Dict[str, float]:
+        values = {}
+        for prefix, collect in self._collectors:
+            for name, value in collect().items():
+                name = f"torn_api_{prefix}_{name}"
+                values[name] = values.get(name, 0) + value
+        return values
+
+    def snapshot(self) -> dict:
+        """
+        :return: All metrics as a dict of plain values, with histograms summarized by count, sum, mean, p50 and
+            p99.
+        """
+        result = {metric.name: metric.snapshot() for metric in
+                  (self.request_latency, self.response_bytes, self.rate_limit_wait, self.errors, self.retries)}
+        result.update(self._collected())
+        return result
+
+    def to_json(self) -> str:
+        """
+        :return: `snapshot()` encoded as JSON.
+        """
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self) -> str:
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in (self.request_latency, self.response_bytes, self.rate_limit_wait, self.errors, self.retries):
+            lines.extend(metric.prometheus())
+        for name, value in self._collected().items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,300 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# Kinds of nested sections
+ONE = "one"  # A single object
+LIST = "list"  # A list of objects
+MAP = "map"  # Objects keyed by ID, e.g. faction members
+
+
+class ModelList(list):
+    """List of decoded models."""
+
+
+class ModelMap(dict):
+    """Decoded models keyed by ID."""
+
+
+class _Lazy:
+    """Descriptor decoding a nested section into its model on first access."""
+
+    __slots__ = ("key", "model", "kind", "slot")
+
+    def __init__(self, key: str, model: type, kind: str):
+        self.key = key
+        self.model = model
+        self.kind = kind
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = "_" + name
+
+    def decode(self, value):
+        if value is None:
+            return None
+        if self.kind == ONE:
+            return self.model.from_dict(value)
+        if self.kind == LIST:
+            return self.model.from_list(value)
+        return ModelMap((int(key) if key.isdigit() else key, self.model.from_dict(item))
+                        for key, item in value.items())
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        # Plain dicts and lists are sections as received, decoded ones are models or model containers
+        if type(value) is dict or type(value) is list:
+            value = self.decode(value)
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
+class _ModelMeta(type):
+    """Builds `__slots__` from the `FIELDS` and `NESTED` declarations of a model."""
+
+    def __new__(mcs, name, bases, namespace):
+        fields = tuple(field if isinstance(field, tuple) else (field, field) for field in namespace.get("FIELDS", ()))
+        nested = namespace.get("NESTED", {})
+        namespace["_fields"] = fields
+        namespace["_nested"] = tuple((attr, spec[0]) for attr, spec in nested.items())
+        namespace["__slots__"] = (tuple(namespace.get("__slots__", ())) + tuple(attr for attr, _ in fields)
+                                  + tuple("_" + attr for attr in nested))
+        for attr, spec in nested.items():
+            namespace[attr] = _Lazy(*spec)
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class Model(metaclass=_ModelMeta):
+    """
+    Base class of the typed response models.
+
+    Fields are stored in `__slots__` instead of a per-instance dict. Nested sections, such as a user's status or a
+    faction's members, are kept as received and only turned into models when first accessed, so loading a large
+    response costs little more than the JSON decode. Keys without a declared field are kept in `extra` so
+    `to_dict()` returns what `from_dict()` was given.
+
+    Subclasses declare `FIELDS`, a tuple of attribute names or (attribute, response key) pairs, and `NESTED`, a
+    dict of attribute to (response key, model, kind) where kind is "one", "list" or "map".
+    """
+
+    __slots__ = ("extra",)
+    FIELDS = ()
+    NESTED = {}
+
+    def __init__(self, **kwargs):
+        for attr, _ in self._fields:
+            setattr(self, attr, kwargs.pop(attr, None))
+        for attr, _ in self._nested:
+            setattr(self, attr, kwargs.pop(attr, None))
+        self.extra = kwargs or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """
+        :param data: Response data, or a section of it.
+        :return: Model instance.
+        """
+        instance = cls.__new__(cls)
+        get = data.get
+        for attr, key in cls._fields:
+            setattr(instance, attr, get(key))
+        for attr, key in cls._nested:
+            setattr(instance, "_" + attr, get(key))
+        known = cls._known_keys()
+        instance.extra = {key: value for key, value in data.items() if key not in known} or None
+        return instance
+
+    @classmethod
+    def from_list(cls, data: List[Dict[str, Any]]) -> ModelList:
+        return ModelList(cls.from_dict(item) for item in data)
+
+    @classmethod
+    def _known_keys(cls):
+        known = cls.__dict__.get("_known")
+        if known is None:
+            known = frozenset(key for _, key in cls._fields) | frozenset(key for _, key in cls._nested)
+            setattr(cls, "_known", known)
+        return known
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: Data in the response format. Nested sections that were never accessed are returned as received.
+        """
+        data = dict(self.extra) if self.extra else {}
+        for attr, key in self._fields:
+            value = getattr(self, attr)
+            if value is not None:
+                data[key] = value
+        for attr, key in self._nested:
+            value = getattr(self, "_" + attr)
+            if value is not None:
+                data[key] = _to_plain(value)
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self._fields[:4])
+        return f"{type(self).__name__}({fields})"
+
+
+def _to_plain(value):
+    if isinstance(value, (Model, ListingArray)):
+        return value.to_dict() if isinstance(value, Model) else value.to_list()
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _to_plain(item) for key, item in value.items()}
+    return value
+
+
+class Bar(Model):
+    FIELDS = ("current", "maximum", "increment", "interval", "ticktime", "fulltime")
+
+
+class Chain(Model):
+    FIELDS = ("current", "maximum", "timeout", "modifier", "cooldown")
+
+
+class Status(Model):
+    FIELDS = ("description", "details", "state", "color", "until")
+
+
+class LastAction(Model):
+    FIELDS = ("status", "timestamp", "relative")
+
+
+class Bars(Model):
+    """Model of the user "bars" selection."""
+    FIELDS = ("server_time",)
+    NESTED = {
+        "happy": ("happy", Bar, ONE),
+        "life": ("life", Bar, ONE),
+        "energy": ("energy", Bar, ONE),
+        "nerve": ("nerve", Bar, ONE),
+        "chain": ("chain", Chain, ONE),
+    }
+
+
+class ProfileFaction(Model):
+    FIELDS = ("position", "faction_id", "days_in_faction", "faction_name", "faction_tag")
+
+
+class ProfileJob(Model):
+    FIELDS = ("position", "company_id", "company_name", "company_type")
+
+
+class UserProfile(Model):
+    """Model of the user "profile" selection."""
+    FIELDS = ("player_id", "name", "level", "rank", "gender", "age", "signup", "role", "donator", "awards",
+              "friends", "enemies", "forum_posts", "karma", "honor", "property", "property_id", "revivable")
+    NESTED = {
+        "life": ("life", Bar, ONE),
+        "status": ("status", Status, ONE),
+        "last_action": ("last_action", LastAction, ONE),
+        "faction": ("faction", ProfileFaction, ONE),
+        "job": ("job", ProfileJob, ONE),
+    }
+
+
+class FactionMember(Model):
+    FIELDS = ("name", "level", "days_in_faction", "position")
+    NESTED = {
+        "last_action": ("last_action", LastAction, ONE),
+        "status": ("status", Status, ONE),
+    }
+
+
+class Faction(Model):
+    """Model of the faction "basic" selection. `members` maps member IDs to `FactionMember`s."""
+    FIELDS = (("id", "ID"), "name", "tag", "tag_image", "leader", ("co_leader", "co-leader"), "respect", "age",
+              "capacity", "best_chain")
+    NESTED = {
+        "members": ("members", FactionMember, MAP),
+    }
+
+
+class MarketListing(Model):
+    FIELDS = (("id", "ID"), "cost", "quantity")
+
+
+class ListingArray:
+    __slots__ = ("ids", "costs", "quantities")
+
+    def __init__(self, ids: array, costs: array, quantities: array):
+        """
+        Market listings stored column-wise in typed arrays, 24 bytes per listing instead of a dict each.
+
+        Indexing and iteration yield `MarketListing`s created on the fly. Loops that only need prices should read
+        `costs` directly.
+        """
+        self.ids = ids
+        self.costs = costs
+        self.quantities = quantities
+
+    @classmethod
+    def from_list(cls, data: List[Dict[str, Any]]) -> Union["ListingArray", ModelList]:
+        """
+        :param data: List of listings as returned by the API.
+        :return: Listing array, or a list of `MarketListing`s if a listing has a value that doesn't fit an array.
+        """
+        try:
+            return cls(array("q", [listing["ID"] for listing in data]),
+                       array("q", [listing["cost"] for listing in data]),
+                       array("q", [listing["quantity"] for listing in data]))
+        except (KeyError, TypeError, OverflowError):
+            return MarketListing.from_list(data)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> MarketListing:
+        return MarketListing(id=self.ids[index], cost=self.costs[index], quantity=self.quantities[index])
+
+    def __iter__(self) -> Iterator[MarketListing]:
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def __eq__(self, other):
+        return (isinstance(other, ListingArray) and self.ids == other.ids and self.costs == other.costs
+                and self.quantities == other.quantities)
+
+    def __repr__(self):
+        return f"ListingArray({len(self)} listings)"
+
+    def cheapest(self) -> Optional[MarketListing]:
+        """
+        :return: Listing with the lowest cost, or None if there are none.
+        """
+        if not self.costs:
+            return None
+        return self[min(range(len(self.costs)), key=self.costs.__getitem__)]
+
+    def to_list(self) -> List[Dict[str, int]]:
+        return [{"ID": listing_id, "cost": cost, "quantity": quantity}
+                for listing_id, cost, quantity in zip(self.ids, self.costs, self.quantities)]
+
+
+class Market(Model):
+    """Model of the market "bazaar" and "itemmarket" selections."""
+    NESTED = {
+        "bazaar": ("bazaar", ListingArray, LIST),
+        "itemmarket": ("itemmarket", ListingArray, LIST),
+    }
+
+
+class Item(Model):
+    FIELDS = ("name", "description", "effect", "requirement", "type", "weapon_type", "buy_price", "sell_price",
+              "market_value", "circulation", "image")
+
+
+class TornItems(Model):
+    """Model of the torn "items" selection. `items` maps item IDs to `Item`s."""
+    NESTED = {
+        "items": ("items", Item, MAP),
+    }
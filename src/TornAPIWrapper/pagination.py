@@ -0,0 +1,78 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _page_records(page: dict, records_key: str):
+    records = page.get(records_key) or {}
+    if isinstance(records, list):
+        return [(record.get("id", index), record) for index, record in enumerate(records)]
+    return list(records.items())
+
+
+def paginate(fetch_page: Callable[[Optional[int]], dict], records_key: str, timestamp_field: str = "timestamp",
+             since: Optional[int] = None, until: Optional[int] = None, page_size: int = 100,
+             prefetch: bool = True) -> Iterator[Tuple[Any, dict]]:
+    """
+    Walk a time-windowed selection backwards from `until` to `since`, one page at a time.
+
+    Each page is requested with `to` set to the oldest timestamp of the previous page. Records sharing that
+    boundary timestamp show up on both pages, so their IDs are remembered and skipped the second time. Only one
+    page is held at a time, plus the next one while it is prefetched.
+
+    :param fetch_page: Callable fetching one page, taking the `to` UNIX timestamp (None for the newest page).
+    :param records_key: Key of the records in the response, e.g. "attacks" or "log".
+    :param timestamp_field: Field of a record holding its UNIX timestamp.
+    :param since: UNIX timestamp of the oldest records to yield.
+    :param until: UNIX timestamp of the newest records to yield.
+    :param page_size: Number of records the API returns for a full page. A shorter page ends the walk.
+    :param prefetch: Whether to request the next page while the current one is being consumed.
+    :return: Iterator of (record ID, record) tuples, newest first.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="torn-api-prefetch") if prefetch else None
+    boundary_timestamp = None
+    boundary_ids: Set[Any] = set()
+    next_page = executor.submit(fetch_page, until) if executor else None
+    to_unix = until
+    try:
+        while True:
+            page = next_page.result() if executor else fetch_page(to_unix)
+            records = _page_records(page, records_key)
+            records.sort(key=lambda item: item[1].get(timestamp_field, 0), reverse=True)
+            full = len(records) >= page_size
+            oldest = records[-1][1].get(timestamp_field) if records else None
+
+            # Start fetching the next page before handing out this one
+            more = full and oldest is not None and (since is None or oldest > since)
+            if more:
+                to_unix = oldest
+                if executor:
+                    next_page = executor.submit(fetch_page, to_unix)
+
+            new_records = 0
+            for record_id, record in records:
+                timestamp = record.get(timestamp_field)
+                if timestamp == boundary_timestamp and record_id in boundary_ids:
+                    continue
+                if since is not None and timestamp is not None and timestamp < since:
+                    continue
+                new_records += 1
+                yield record_id, record
+
+            if oldest is not None:
+                if oldest != boundary_timestamp:
+                    boundary_timestamp, boundary_ids = oldest, set()
+                boundary_ids.update(record_id for record_id, record in records
+                                    if record.get(timestamp_field) == oldest)
+
+            if not more:
+                break
+            if new_records == 0:
+                logger.warning("More than %d %s records share timestamp %s, stopping pagination.", page_size,
+                               records_key, oldest)
+                break
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
@@ -0,0 +1,312 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Iterable, Optional
+
+# Seconds a request is kept in the window beyond its period. Slots are claimed before the request is sent, but the
+# API counts it when it arrives, so without a margin a request can land inside the API's window of an earlier one.
+DEFAULT_WINDOW_MARGIN = 1.0
+
+
+class RateLimiter:
+    """
+    Base class for thread-safe request rate limiters.
+
+    Subclasses implement `_try_take` and `_wait_time`, which are always called with the limiter's lock held.
+    Requests may dip into the `reserve` slots only when they ask for it, which keeps headroom for urgent calls.
+    """
+
+    def __init__(self, reserve: int = 0):
+        """
+        :param reserve: Number of slots that are only handed out to callers passing `use_reserve=True`.
+        """
+        self.reserve = reserve
+        self._condition = threading.Condition()
+
+    def _try_take(self, now: float, reserve: int) -> bool:
+        raise NotImplementedError
+
+    def _wait_time(self, now: float, reserve: int) -> float:
+        raise NotImplementedError
+
+    def _available(self, now: float) -> float:
+        raise NotImplementedError
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: Maximum number of slots, i.e. the window limit or bucket size.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release resources held by the limiter, such as database connections.
+        """
+
+    def _reserve_for(self, use_reserve: bool, reserve: Optional[int]) -> int:
+        if reserve is not None:
+            return reserve
+        return 0 if use_reserve else self.reserve
+
+    def try_acquire(self, use_reserve: bool = False, reserve: Optional[int] = None) -> bool:
+        """
+        Claim a request slot if one is free right now, without waiting.
+
+        :param use_reserve: Whether the reserved slots may be used.
+        :param reserve: Number of slots to leave free, overriding the limiter's own reserve.
+        :return: True if a slot was claimed.
+        """
+        reserve = self._reserve_for(use_reserve, reserve)
+        with self._condition:
+            return self._try_take(time.time(), reserve)
+
+    def acquire(self, timeout: Optional[float] = None, use_reserve: bool = False) -> bool:
+        """
+        Wait until a request slot is free and claim it.
+
+        The wait is computed from the limiter state, so callers sleep exactly until the next slot frees up.
+
+        :param timeout: Maximum time in seconds to wait. `None` waits as long as needed.
+        :param use_reserve: Whether the reserved slots may be used.
+        :return: True if a slot was claimed, False if the timeout expired first.
+        """
+        reserve = 0 if use_reserve else self.reserve
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                now = time.time()
+                if self._try_take(now, reserve):
+                    return True
+                delay = self._wait_time(now, reserve)
+                if deadline is not None:
+                    if now + delay > deadline:
+                        return False
+                self._condition.wait(delay)
+
+    def wait_time(self, use_reserve: bool = False, reserve: Optional[int] = None) -> float:
+        """
+        :param use_reserve: Whether the reserved slots may be used.
+        :param reserve: Number of slots to leave free, overriding the limiter's own reserve.
+        :return: Seconds until a slot frees up, 0 if one is free now.
+        """
+        reserve = self._reserve_for(use_reserve, reserve)
+        with self._condition:
+            return self._wait_time(time.time(), reserve)
+
+    def available(self) -> float:
+        """
+        :return: Number of slots that are free right now, including reserved ones.
+        """
+        with self._condition:
+            return self._available(time.time())
+
+
+class SlidingWindowRateLimiter(RateLimiter):
+    def __init__(self, limit: int = 100, period: float = 60.0, reserve: int = 0,
+                 request_times: Iterable[float] = (), margin: float = DEFAULT_WINDOW_MARGIN):
+        """
+        Initialize an exact sliding window rate limiter, matching how the Torn API counts requests.
+
+        :param limit: Maximum number of requests allowed within the window.
+        :param period: Length of the window in seconds.
+        :param reserve: Number of slots that are only handed out to callers passing `use_reserve=True`.
+        :param request_times: UNIX timestamps of earlier requests to seed the window with.
+        :param margin: Seconds added to the window to cover the time a request takes to reach the API.
+        """
+        super().__init__(reserve)
+        self.limit = limit
+        self.period = period
+        self.margin = margin
+        self.request_times = deque(sorted(request_times))
+
+    def _prune(self, now: float):
+        while self.request_times and self.request_times[0] <= now - self.period - self.margin:
+            self.request_times.popleft()
+
+    def _try_take(self, now: float, reserve: int) -> bool:
+        self._prune(now)
+        if len(self.request_times) < self.limit - reserve:
+            self.request_times.append(now)
+            return True
+        return False
+
+    def _wait_time(self, now: float, reserve: int) -> float:
+        self._prune(now)
+        excess = len(self.request_times) - (self.limit - reserve)
+        if excess < 0:
+            return 0.0
+        if excess >= len(self.request_times):
+            return self.period + self.margin
+        # The slot frees up once enough of the oldest requests have left the window
+        return max(self.request_times[excess] + self.period + self.margin - now, 0.0)
+
+    def _available(self, now: float) -> float:
+        self._prune(now)
+        return max(self.limit - len(self.request_times), 0)
+
+    @property
+    def capacity(self) -> int:
+        return self.limit
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    def __init__(self, rate: float = 100 / 60, burst: int = 100, reserve: int = 0):
+        """
+        Initialize a token bucket rate limiter.
+
+        :param rate: Tokens added per second.
+        :param burst: Bucket capacity, i.e. the largest burst of back-to-back requests.
+        :param reserve: Number of tokens that are only handed out to callers passing `use_reserve=True`.
+        """
+        super().__init__(reserve)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.time()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _try_take(self, now: float, reserve: int) -> bool:
+        self._refill(now)
+        if self.tokens - reserve >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _wait_time(self, now: float, reserve: int) -> float:
+        self._refill(now)
+        return max((1 + reserve - self.tokens) / self.rate, 0.0)
+
+    def _available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    @property
+    def capacity(self) -> int:
+        return self.burst
+
+
+class SQLiteRateLimiter(RateLimiter):
+    def __init__(self, path: str, bucket: str = "default", limit: int = 100, period: float = 60.0,
+                 reserve: int = 0, margin: float = DEFAULT_WINDOW_MARGIN):
+        """
+        Initialize a sliding window rate limiter whose state lives in a SQLite database.
+
+        Every process on the host that opens the same database file and bucket shares one request budget. The
+        database runs in WAL mode and each request is a single short transaction: expired rows are deleted, the
+        rows still in the window are counted through an index and one row is inserted. The cost per request is
+        bounded by the window size, not by how many requests were made before.
+
+        :param path: Path to the SQLite database file.
+        :param bucket: Name of the budget to share, e.g. one per API key.
+        :param limit: Maximum number of requests allowed within the window.
+        :param period: Length of the window in seconds.
+        :param reserve: Number of slots that are only handed out to callers passing `use_reserve=True`.
+        :param margin: Seconds added to the window to cover the time a request takes to reach the API.
+        """
+        super().__init__(reserve)
+        self.path = path
+        self.bucket = bucket
+        self.limit = limit
+        self.period = period
+        self.margin = margin
+
+        # The connection is only used while holding the limiter lock
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS requests (bucket TEXT NOT NULL, time REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS requests_bucket_time ON requests (bucket, time)")
+
+    def _try_take(self, now: float, reserve: int) -> bool:
+        # BEGIN IMMEDIATE takes the write lock up front, so check and insert are atomic across processes
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute("DELETE FROM requests WHERE bucket = ? AND time <= ?",
+                                     (self.bucket, now - self.period - self.margin))
+            taken = self._available(now) > reserve
+            if taken:
+                self._connection.execute("INSERT INTO requests (bucket, time) VALUES (?, ?)", (self.bucket, now))
+            self._connection.execute("COMMIT")
+        except sqlite3.Error:
+            self._connection.execute("ROLLBACK")
+            raise
+        return taken
+
+    def _wait_time(self, now: float, reserve: int) -> float:
+        request_times = [row[0] for row in self._connection.execute(
+            "SELECT time FROM requests WHERE bucket = ? AND time > ? ORDER BY time",
+            (self.bucket, now - self.period - self.margin))]
+        excess = len(request_times) - (self.limit - reserve)
+        if excess < 0:
+            return 0.0
+        if excess >= len(request_times):
+            return self.period + self.margin
+        return max(request_times[excess] + self.period + self.margin - now, 0.0)
+
+    def _available(self, now: float) -> float:
+        count = self._connection.execute("SELECT COUNT(*) FROM requests WHERE bucket = ? AND time > ?",
+                                         (self.bucket, now - self.period - self.margin)).fetchone()[0]
+        return max(self.limit - count, 0)
+
+    @property
+    def capacity(self) -> int:
+        return self.limit
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._condition:
+            self._connection.close()
+
+
+class AsyncSlidingWindowRateLimiter:
+    def __init__(self, limit: int = 100, period: float = 60.0, margin: float = DEFAULT_WINDOW_MARGIN):
+        """
+        Initialize an asyncio-aware sliding window rate limiter.
+
+        Waiting callers sleep with `asyncio.sleep` for exactly as long as it takes for the oldest request to leave
+        the window, so the event loop keeps running while the budget is exhausted.
+
+        :param limit: Maximum number of requests allowed within the window.
+        :param period: Length of the window in seconds.
+        :param margin: Seconds added to the window to cover the time a request takes to reach the API.
+        """
+        self.limit = limit
+        self.period = period
+        self.margin = margin
+        self.request_times = deque()
+        self._lock = None
+
+    def _prune(self, now: float):
+        while self.request_times and self.request_times[0] <= now - self.period - self.margin:
+            self.request_times.popleft()
+
+    async def acquire(self) -> float:
+        """
+        Wait until a request slot is free and claim it.
+
+        :return: Time in seconds spent waiting for the slot.
+        """
+        import asyncio
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        waited = 0.0
+        # Callers queue on the lock, so slots are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if len(self.request_times) < self.limit:
+                    self.request_times.append(now)
+                    return waited
+                delay = self.request_times[0] + self.period + self.margin - now
+                await asyncio.sleep(delay)
+                waited += delay
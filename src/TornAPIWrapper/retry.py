@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from .torn_api_error_handler import TornApiError
+
+# Errors that may clear up by themselves: too many requests, key read error, temporary error, backend error
+RETRYABLE_ERROR_CODES = frozenset({5, 12, 15, 17})
+
+# HTTP status codes worth retrying
+RETRYABLE_HTTP_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Errors after which a key is not used again for a while: IP block, API disabled, owner in federal jail,
+# owner inactive, key paused
+CIRCUIT_BREAKER_ERROR_CODES = frozenset({8, 9, 10, 13, 18})
+
+# Errors that only concern the key making the request: incorrect key, too many requests, owner in federal jail,
+# owner inactive, key paused
+KEY_SPECIFIC_ERROR_CODES = frozenset({2, 5, 10, 13, 18})
+
+
+class CircuitOpenError(TornApiError):
+    """Raised without making a request while a key's circuit breaker is open."""
+
+
+def is_key_specific_error(error: BaseException) -> bool:
+    """
+    :param error: Exception raised by a request.
+    :return: Whether the error only concerns the API key that made the request, so the same request made with
+        another key may succeed.
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    return isinstance(error, TornApiError) and error.error_code in KEY_SPECIFIC_ERROR_CODES
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 jitter: bool = True, too_many_requests_delay: float = 10.0,
+                 retryable_error_codes: Iterable[int] = RETRYABLE_ERROR_CODES,
+                 retryable_http_statuses: Iterable[int] = RETRYABLE_HTTP_STATUSES):
+        """
+        Decide whether and when a failed request is retried.
+
+        Retries use exponential backoff, `backoff_base * 2 ** attempt` capped at `backoff_max`. With jitter the
+        delay is drawn between half and all of that, so clients that failed together don't retry together.
+        Permanent errors such as an incorrect key (2), incorrect ID (6/7) or missing access (16) are never
+        retried.
+
+        :param max_retries: Maximum number of retries per request. 0 disables retries.
+        :param backoff_base: Delay in seconds before the first retry.
+        :param backoff_max: Maximum delay in seconds between retries.
+        :param jitter: Whether to randomize delays.
+        :param too_many_requests_delay: Minimum delay in seconds after error 5, since the API blocks the key for
+            a while.
+        :param retryable_error_codes: Torn API error codes that are retried.
+        :param retryable_http_statuses: HTTP status codes that are retried.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.too_many_requests_delay = too_many_requests_delay
+        self.retryable_error_codes = frozenset(retryable_error_codes)
+        self.retryable_http_statuses = frozenset(retryable_http_statuses)
+
+    def is_retryable(self, error: Exception) -> bool:
+        """
+        :param error: Exception raised by a request.
+        :return: Whether the request may succeed if retried.
+        """
+        import requests
+
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, TornApiError):
+            return error.error_code in self.retryable_error_codes
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code in self.retryable_http_statuses
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def backoff(self, attempt: int) -> float:
+        """
+        :param attempt: Number of the retry, starting at 0.
+        :return: Backoff delay in seconds.
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+    def get_delay(self, error: Exception, attempt: int, retry_after: Optional[float] = None,
+                  rate_limit_wait: float = 0.0) -> Optional[float]:
+        """
+        Compute how long to wait before retrying a failed request.
+
+        :param error: Exception raised by the request.
+        :param attempt: Number of retries made so far.
+        :param retry_after: Value of the response's `Retry-After` header in seconds, if any.
+        :param rate_limit_wait: Time in seconds until the local rate limiter has a free slot.
+        :return: Delay in seconds, or None if the request should not be retried.
+        """
+        if attempt >= self.max_retries or not self.is_retryable(error):
+            return None
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if isinstance(error, TornApiError) and error.error_code == 5:
+            delay = max(delay, self.too_many_requests_delay, rate_limit_wait)
+        return min(delay, max(self.backoff_max, retry_after or 0))
+
+
+class CircuitBreaker:
+    def __init__(self, reset_timeout: float = 300.0,
+                 error_codes: Iterable[int] = CIRCUIT_BREAKER_ERROR_CODES):
+        """
+        Stop using a key for a while after an error that makes every further request with it fail.
+
+        :param reset_timeout: Time in seconds the circuit stays open. After that one request is let through to
+            test the key again, and all others are rejected until it has completed.
+        :param error_codes: Torn API error codes that open the circuit.
+        """
+        self.reset_timeout = reset_timeout
+        self.error_codes = frozenset(error_codes)
+        self._open_until: Dict[str, float] = {}
+        self._open_codes: Dict[str, int] = {}
+        # Keys with a trial request in flight, to the time it started
+        self._probes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def check(self, api_key: str):
+        """
+        :param api_key: API key about to be used.
+        :raises CircuitOpenError: If the key's circuit is open.
+        """
+        with self._lock:
+            now = time.time()
+            open_until = self._open_until.get(api_key)
+            if open_until is None:
+                return
+            error_code = self._open_codes[api_key]
+            if now >= open_until:
+                probe_started = self._probes.get(api_key)
+                # A trial whose outcome was never recorded doesn't block the key forever
+                if probe_started is None or now - probe_started >= self.reset_timeout:
+                    # Half-open: let this request through, its outcome closes or reopens the circuit
+                    self._probes[api_key] = now
+                    return
+                raise CircuitOpenError(error_code, f"Key disabled after error {error_code}, waiting for a trial "
+                                                   f"request.")
+        raise CircuitOpenError(error_code, f"Key disabled after error {error_code}, not retrying for "
+                                           f"{open_until - now:.0f}s.")
+
+    def record_failure(self, api_key: str, error_code: int) -> bool:
+        """
+        :param api_key: API key that received the error.
+        :param error_code: Torn API error code.
+        :return: True if the error opened the circuit.
+        """
+        if error_code not in self.error_codes:
+            # The API answered without blaming the key, so it works again
+            self.record_success(api_key)
+            return False
+        with self._lock:
+            self._probes.pop(api_key, None)
+            self._open_until[api_key] = time.time() + self.reset_timeout
+            self._open_codes[api_key] = error_code
+        return True
+
+    def record_success(self, api_key: str):
+        """
+        :param api_key: API key that made a successful request.
+        """
+        with self._lock:
+            self._probes.pop(api_key, None)
+            self._open_until.pop(api_key, None)
+
+    def release(self, api_key: str):
+        """
+        End a trial request without a verdict, e.g. after a network error, so another request may test the key.
+
+        :param api_key: API key the request was made with.
+        """
+        with self._lock:
+            self._probes.pop(api_key, None)
+
+    def is_open(self, api_key: str) -> bool:
+        """
+        :param api_key: API key.
+        :return: Whether the key's circuit is currently open.
+        """
+        with self._lock:
+            return self._open_until.get(api_key, 0) > time.time()
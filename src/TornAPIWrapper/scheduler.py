@@ -0,0 +1,165 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from .rate_limiter import RateLimiter
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BULK = "bulk"
+
+# Priority classes from highest to lowest
+PRIORITIES = (INTERACTIVE, NORMAL, BULK)
+
+# Share of the request budget that lower classes may not use, per class
+DEFAULT_RESERVED_SHARES: Dict[str, float] = {
+    INTERACTIVE: 0.2,
+    NORMAL: 0.1,
+    BULK: 0.0,
+}
+
+
+class RequestDropped(Exception):
+    """Raised when the scheduler refuses a request or cannot serve it before its deadline."""
+
+
+class Ticket:
+    def __init__(self, priority: str = NORMAL, deadline: Optional[float] = None):
+        """
+        Priority class and deadline of one request. Callers waiting for the same request can raise them while it
+        waits for a slot, see `promote`.
+
+        :param priority: Priority class, one of `PRIORITIES`.
+        :param deadline: Optional UNIX timestamp after which the request is no longer useful.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class {priority!r}, expected one of {PRIORITIES}.")
+        self.priority = priority
+        self.deadline = deadline
+
+    def promote(self, priority: str, deadline: Optional[float] = None):
+        """
+        Raise the class to `priority` if it is higher, and keep the request until the later of both deadlines.
+
+        :param priority: Priority class of another caller waiting for the request.
+        :param deadline: Deadline of that caller, None if it has none.
+        """
+        if PRIORITIES.index(priority) < PRIORITIES.index(self.priority):
+            self.priority = priority
+        if self.deadline is not None:
+            self.deadline = None if deadline is None else max(self.deadline, deadline)
+
+
+class PriorityScheduler:
+    def __init__(self, rate_limiter: RateLimiter, reserved_shares: Dict[str, float] = None,
+                 max_waiting: Dict[str, int] = None, poll_interval: float = 0.1):
+        """
+        Hand out rate limiter slots by priority class.
+
+        Each class has a reserved share of the budget that lower classes may not use, so background crawls can
+        take whatever is left without starving interactive calls. Queued higher-priority requests are always
+        served first.
+
+        :param rate_limiter: Rate limiter holding the request budget.
+        :param reserved_shares: Share of the budget reserved per class, merged over `DEFAULT_RESERVED_SHARES`.
+        :param max_waiting: Optional maximum number of queued requests per class. Further requests are dropped.
+        :param poll_interval: Longest time in seconds a waiting request sleeps before checking the budget again.
+        """
+        self.rate_limiter = rate_limiter
+        self.reserved_shares = dict(DEFAULT_RESERVED_SHARES)
+        if reserved_shares:
+            self.reserved_shares.update(reserved_shares)
+        self.max_waiting = max_waiting or {}
+        self.poll_interval = poll_interval
+
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        self.dropped = {priority: 0 for priority in PRIORITIES}
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+    def _reserve_below(self, priority: str) -> int:
+        """
+        :return: Number of slots a request of the given class must leave free for higher classes.
+        """
+        share = sum(self.reserved_shares.get(higher, 0) for higher in PRIORITIES[:PRIORITIES.index(priority)])
+        return int(self.rate_limiter.capacity * share)
+
+    def acquire(self, priority: str = NORMAL, deadline: Optional[float] = None,
+                ticket: Optional[Ticket] = None) -> float:
+        """
+        Wait for a request slot for the given class and claim it.
+
+        :param priority: Priority class, one of `PRIORITIES`.
+        :param deadline: Optional UNIX timestamp after which the request is no longer useful.
+        :param ticket: Optional ticket holding the class and deadline instead, which may be promoted while waiting.
+        :return: Time in seconds spent waiting.
+        :raises RequestDropped: If the class's queue is full, or the deadline passes or can't be met.
+        """
+        if ticket is None:
+            ticket = Ticket(priority, deadline)
+        start = time.time()
+
+        with self._condition:
+            priority = ticket.priority
+            limit = self.max_waiting.get(priority)
+            if limit is not None and self.waiting[priority] >= limit:
+                self.dropped[priority] += 1
+                raise RequestDropped(f"Too many {priority} requests waiting.")
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    if ticket.priority != priority:
+                        # Promoted by another caller of the same request
+                        self.waiting[priority] -= 1
+                        priority = ticket.priority
+                        self.waiting[priority] += 1
+                    reserve = self._reserve_below(priority)
+                    higher = PRIORITIES[:PRIORITIES.index(priority)]
+                    if not any(self.waiting[h] for h in higher) and self.rate_limiter.try_acquire(reserve=reserve):
+                        # Let lower classes re-check now that the budget changed
+                        self._condition.notify_all()
+                        return time.time() - start
+
+                    now = time.time()
+                    delay = self.rate_limiter.wait_time(reserve=reserve)
+                    if ticket.deadline is not None and now + delay > ticket.deadline:
+                        self.dropped[priority] += 1
+                        raise RequestDropped(f"{priority.capitalize()} request can't be served before its "
+                                             f"deadline.")
+                    self._condition.wait(min(max(delay, 0.001), self.poll_interval))
+            finally:
+                self.waiting[priority] -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def priority(self, priority: str, timeout: Optional[float] = None):
+        """
+        Run requests made by the current thread inside the block with the given class and timeout.
+
+        :param priority: Priority class, one of `PRIORITIES`.
+        :param timeout: Optional time in seconds after which waiting requests are dropped.
+        """
+        with self.restore((priority, None if timeout is None else time.time() + timeout)):
+            yield
+
+    @contextmanager
+    def restore(self, context: Tuple[str, Optional[float]]):
+        """
+        Run requests made by the current thread inside the block with a class and deadline taken from `current()`,
+        e.g. on a worker thread doing work for the thread that called `current()`.
+
+        :param context: Tuple of the priority class and deadline.
+        """
+        previous = getattr(self._local, "context", None)
+        self._local.context = context
+        try:
+            yield
+        finally:
+            self._local.context = previous
+
+    def current(self, default: str = NORMAL):
+        """
+        :param default: Priority class to use outside of a `priority` block.
+        :return: Tuple of the current thread's priority class and deadline.
+        """
+        return getattr(self._local, "context", None) or (default, None)
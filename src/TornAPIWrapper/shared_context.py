@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+from typing import TYPE_CHECKING, AbstractSet, Dict, Optional
+from .cache import Cache, DiskCache, DEFAULT_PUBLIC_SELECTIONS
+from .metrics import Metrics
+from .rate_limiter import RateLimiter, SlidingWindowRateLimiter, SQLiteRateLimiter
+from .scheduler import Ticket
+from .single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    import requests
+    from .torn_api_error_handler import TornApiErrorHandler
+
+
+def key_hash(api_key: str) -> str:
+    """
+    :param api_key: API key.
+    :return: Short stable hash of the key, used where the key itself must not be stored.
+    """
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class SharedContext:
+    def __init__(self, log_directory: Optional[str] = None, cache_ttl: float = 300, persistent_cache: bool = False,
+                 stale_ttl: float = 0, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, request_limit: int = 100, metrics: Optional[Metrics] = None,
+                 public_selections: AbstractSet[str] = DEFAULT_PUBLIC_SELECTIONS):
+        """
+        State shared by the `TornApiWrapper`s of one process: the HTTP session, the cache, a rate limiter per key
+        and the metrics.
+
+        Wrappers created with `context=` skip all per-instance setup: they don't configure logging, touch the
+        file system or create sessions. Everything here is created on first use, so building a wrapper per call,
+        e.g. in a serverless handler, costs a few attribute assignments. Keep one context per process, e.g. at
+        module level, and close it on shutdown.
+
+        Responses to public selections, such as `torn/items`, markets or other players' profiles, are cached once
+        for all keys. Everything else is cached per key, so wrappers never see another key's private data. With
+        `persistent_cache`, processes sharing `log_directory` also share the cached public responses.
+
+        :param log_directory: Directory for the request log and persistent cache databases. Without one, rate
+            limits are tracked in memory only, so they aren't shared with other processes.
+        :param cache_ttl: Default time-to-live for the shared cache in seconds.
+        :param persistent_cache: Whether to back the cache with an SQLite database in `log_directory`.
+        :param stale_ttl: How long in seconds expired cache entries may still be served while being refreshed.
+        :param pool_connections: Number of connection pools to cache.
+        :param pool_maxsize: Maximum number of connections to keep per pool.
+        :param pool_block: Whether to block when no connection is available.
+        :param keep_alive: Whether to keep connections open between requests.
+        :param request_limit: Requests per minute allowed per key.
+        :param metrics: Metrics shared by the wrappers. Defaults to a new `Metrics()`.
+        :param public_selections: Endpoints and "endpoint/selection"s whose responses are shared by all keys.
+            Defaults to `DEFAULT_PUBLIC_SELECTIONS`.
+        """
+        self.log_directory = log_directory
+        self.cache_ttl = cache_ttl
+        self.persistent_cache = persistent_cache
+        self.stale_ttl = stale_ttl
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.request_limit = request_limit
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.public_selections = frozenset(public_selections)
+        # Shared so concurrent wrappers asking for the same public data wait for one request
+        self.single_flight = SingleFlight()
+        # Priority of the requests in flight, so wrappers waiting for them can raise it
+        self.tickets: Dict[str, Ticket] = {}
+
+        self._session: Optional["requests.Session"] = None
+        self._cache: Optional[Cache] = None
+        self._error_handler: Optional["TornApiErrorHandler"] = None
+        self._rate_limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, file_name: str) -> str:
+        os.makedirs(self.log_directory, exist_ok=True)
+        return os.path.join(self.log_directory, file_name)
+
+    @property
+    def session(self) -> "requests.Session":
+        """HTTP session shared by all wrappers, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    from .torn_api_wrapper import TornApiWrapper
+                    self._session = TornApiWrapper._create_session(self.pool_connections, self.pool_maxsize,
+                                                                   self.pool_block, self.keep_alive)
+        return self._session
+
+    @property
+    def cache(self) -> Cache:
+        """Cache shared by all wrappers, created on first use. Wrappers partition private responses by API key."""
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    disk_cache = DiskCache(self._path("cache.db")) if self.persistent_cache and self.log_directory \
+                        else None
+                    cache = Cache(ttl=self.cache_ttl, disk_cache=disk_cache, stale_ttl=self.stale_ttl)
+                    self.metrics.add_collector("cache", cache.stats)
+                    self._cache = cache
+        return self._cache
+
+    @property
+    def error_handler(self) -> "TornApiErrorHandler":
+        """Error handler shared by all wrappers. Unlike a default `TornApiErrorHandler`, it leaves logging alone."""
+        if self._error_handler is None:
+            from .torn_api_error_handler import TornApiErrorHandler
+            self._error_handler = TornApiErrorHandler(configure_logging=False)
+        return self._error_handler
+
+    def rate_limiter(self, api_key: str) -> RateLimiter:
+        """
+        :param api_key: API key.
+        :return: The key's rate limiter, shared by all wrappers using the key.
+        """
+        bucket = key_hash(api_key)
+        rate_limiter = self._rate_limiters.get(bucket)
+        if rate_limiter is None:
+            with self._lock:
+                rate_limiter = self._rate_limiters.get(bucket)
+                if rate_limiter is None:
+                    if self.log_directory:
+                        rate_limiter = SQLiteRateLimiter(self._path("request_log.db"), bucket=bucket,
+                                                         limit=self.request_limit, period=60)
+                    else:
+                        rate_limiter = SlidingWindowRateLimiter(self.request_limit, 60)
+                    self._rate_limiters[bucket] = rate_limiter
+        return rate_limiter
+
+    def close(self):
+        """
+        Close the session and the databases opened by the context.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            for rate_limiter in self._rate_limiters.values():
+                rate_limiter.close()
+            self._rate_limiters.clear()
+            if self._cache is not None:
+                self.metrics.remove_collector("cache", self._cache.stats)
+                if self._cache.disk_cache is not None:
+                    self._cache.disk_cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,104 @@
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Deduplicate identical calls that are in flight at the same time.
+
+        The first caller for a key runs the function. Callers arriving with the same key while it runs wait for
+        it and receive the same result, or the same exception.
+        """
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any],
+           share_error: Optional[Callable[[BaseException], bool]] = None) -> Any:
+        """
+        Run `function` once for all concurrent callers with the same key.
+
+        :param key: Key identifying identical calls, e.g. the canonical cache key.
+        :param function: Function to run.
+        :param share_error: Optional check whether this caller can take the exception of another caller's run.
+            If not, the call is made again, e.g. because the error only concerns the other caller's API key.
+        :return: Result of the function.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    self.shared += 1
+
+            if leader:
+                try:
+                    call.result = function()
+                except BaseException as e:
+                    call.error = e
+                finally:
+                    with self._lock:
+                        del self._calls[key]
+                    call.done.set()
+            else:
+                call.done.wait()
+
+            if call.error is None:
+                return call.result
+            if leader or share_error is None or share_error(call.error):
+                raise call.error
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """
+        Deduplicate identical coroutines that are in flight at the same time on one event loop.
+        """
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await `function()` once for all concurrent callers with the same key.
+
+        :param key: Key identifying identical calls, e.g. the canonical cache key.
+        :param function: Coroutine function to run.
+        :return: Result of the coroutine.
+        """
+        import asyncio
+
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # Shield so a cancelled follower doesn't cancel the shared call
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
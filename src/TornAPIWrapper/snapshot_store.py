@@ -0,0 +1,417 @@
+import bisect
+import mmap
+import os
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from . import json_codec
+
+# Keys holding the member records in the responses the store ingests
+RECORDS_KEYS = ("members", "company_employees", "employees")
+
+# Fields that change on every snapshot without carrying information, e.g. "5 minutes ago"
+DEFAULT_IGNORED_FIELDS = frozenset({"last_action.relative"})
+
+# Kinds of a stored value
+INTEGER = 0
+ENCODED = 1  # Index into the store's dictionary of other values
+MISSING = 2  # The member or field disappeared
+
+SNAPSHOTS = "_snapshots"
+
+
+def flatten(record: dict, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """
+    :param record: Member record, possibly with nested dicts such as "last_action".
+    :param prefix: Prefix of the field names.
+    :return: Iterator of (dotted field name, scalar value) tuples.
+    """
+    for field, value in record.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{field}.")
+        else:
+            yield f"{prefix}{field}", value
+
+
+class _Vector:
+    def __init__(self, path: Optional[str], typecode: str, length: int = 0):
+        """
+        Append-only typed vector. Values written before opening are read from a memory-mapped file, new values are
+        kept in an array and appended to the file on `flush`.
+
+        :param path: File backing the vector, or None to keep it in memory.
+        :param typecode: `array` typecode of the values.
+        :param length: Number of values to keep from the file. Anything after them, e.g. from an interrupted
+            write, is cut off.
+        """
+        self.typecode = typecode
+        self._mmap = None
+        self._base: Any = ()
+        self._tail = array(typecode)
+        self._flushed = 0
+        self._file = None
+        if path is not None:
+            size = length * self._tail.itemsize
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                os.truncate(path, size)
+            if size:
+                with open(path, "rb") as file:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._base = memoryview(self._mmap).cast(typecode)
+            self._file = open(path, "ab")
+
+    @staticmethod
+    def stored_length(path: Optional[str], typecode: str) -> int:
+        """
+        :return: Number of complete values in the file backing a vector.
+        """
+        if path is None or not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // array(typecode).itemsize
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._tail)
+
+    def __getitem__(self, index: int):
+        base_length = len(self._base)
+        if index < base_length:
+            return self._base[index]
+        return self._tail[index - base_length]
+
+    def slice(self, start: int, stop: int) -> array:
+        """
+        :return: Values from `start` up to `stop`, copied into an array in one operation per storage part.
+        """
+        base_length = len(self._base)
+        values = array(self.typecode, self._base[start:min(stop, base_length)])
+        if stop > base_length:
+            values.extend(self._tail[max(start - base_length, 0):stop - base_length])
+        return values
+
+    def append(self, value: int):
+        self._tail.append(value)
+
+    def flush(self):
+        if self._file is not None and self._flushed < len(self._tail):
+            self._tail[self._flushed:].tofile(self._file)
+            self._file.flush()
+            self._flushed = len(self._tail)
+
+    def close(self):
+        self.flush()
+        if isinstance(self._base, memoryview):
+            self._base.release()
+            self._base = ()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Column:
+    def __init__(self, directory: Optional[str], name: str):
+        """
+        Changes of one field across all members, as parallel vectors of timestamp, member ID, value kind and value.
+        """
+        layout = {"ts": "q", "member": "q", "kind": "b", "value": "q"}
+        paths = {extension: os.path.join(directory, f"{name}.{extension}") if directory else None
+                 for extension in layout}
+        # Vectors are written one after the other, so an interrupted flush may leave some of them longer
+        length = min(_Vector.stored_length(paths[extension], typecode) for extension, typecode in layout.items())
+
+        self.name = name
+        self.timestamps = _Vector(paths["ts"], "q", length)
+        self.members = _Vector(paths["member"], "q", length)
+        self.kinds = _Vector(paths["kind"], "b", length)
+        self.values = _Vector(paths["value"], "q", length)
+        self._positions: Optional[Dict[int, array]] = None
+        self._last: Dict[int, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def _index(self) -> Dict[int, array]:
+        """
+        :return: Positions of each member's changes, built with one pass over the stored vectors on first use.
+        """
+        if self._positions is None:
+            positions: Dict[int, array] = {}
+            members, kinds, values = self.members, self.kinds, self.values
+            for position in range(len(self)):
+                member_id = members[position]
+                positions.setdefault(member_id, array("q")).append(position)
+                self._last[member_id] = (kinds[position], values[position])
+            self._positions = positions
+        return self._positions
+
+    def last(self, member_id: int) -> Optional[Tuple[int, int]]:
+        self._index()
+        return self._last.get(member_id)
+
+    def present_members(self) -> List[int]:
+        """
+        :return: IDs of the members whose latest value isn't missing.
+        """
+        self._index()
+        return [member_id for member_id, (kind, _) in self._last.items() if kind != MISSING]
+
+    def append(self, timestamp: int, member_id: int, kind: int, value: int):
+        """
+        Record a value, unless it equals the member's previous value.
+        """
+        positions = self._index()
+        if self._last.get(member_id) == (kind, value):
+            return
+        if kind == MISSING and member_id not in self._last:
+            return
+        positions.setdefault(member_id, array("q")).append(len(self))
+        self._last[member_id] = (kind, value)
+        self.timestamps.append(timestamp)
+        self.members.append(member_id)
+        self.kinds.append(kind)
+        self.values.append(value)
+
+    def member_positions(self, member_id: int) -> array:
+        return self._index().get(member_id, array("q"))
+
+    def flush(self):
+        for vector in (self.timestamps, self.members, self.kinds, self.values):
+            vector.flush()
+
+    def close(self):
+        for vector in (self.timestamps, self.members, self.kinds, self.values):
+            vector.close()
+
+
+class SnapshotStore:
+    def __init__(self, path: Optional[str] = None, ignored_fields: Iterable[str] = DEFAULT_IGNORED_FIELDS):
+        """
+        Columnar history of faction members or company employees, built from repeated snapshots.
+
+        Each field of the member records, e.g. "level" or "last_action.status", is a column of change events. A
+        value is only stored when it differs from the member's previous value, so storage grows with the number of
+        changes rather than the number of snapshots. Integers are stored as-is and all other values as indexes
+        into a dictionary of distinct values. Columns are arrays of fixed-width integers. With a `path` they are
+        append-only files that are memory-mapped when the store is opened, so history queries read binary data
+        instead of re-parsing responses.
+
+        Keep one store per faction or company.
+
+        :param path: Directory holding the store's files, created if missing. None keeps the store in memory.
+        :param ignored_fields: Dotted field names that are not stored.
+        """
+        self.path = path
+        self.ignored_fields = frozenset(ignored_fields)
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self._columns: Dict[str, _Column] = {}
+        self._values: List[Any] = []
+        self._codes: Dict[bytes, int] = {}
+        self._dictionary_file = None
+        self._lock = threading.Lock()
+
+        if path is not None:
+            dictionary_path = os.path.join(path, "dictionary.jsonl")
+            if os.path.exists(dictionary_path):
+                with open(dictionary_path, "rb+") as file:
+                    complete = 0
+                    for line in file:
+                        if not line.endswith(b"\n"):
+                            # Cut short by an interrupted flush. It is written before the columns, so no stored
+                            # code points to it yet.
+                            break
+                        self._add_value(line[:-1])
+                        complete += len(line)
+                    file.truncate(complete)
+            self._dictionary_file = open(dictionary_path, "ab")
+            for file_name in sorted(os.listdir(path)):
+                if file_name.endswith(".kind"):
+                    name = file_name[:-len(".kind")]
+                    self._columns[name] = _Column(path, name)
+        self._snapshots = self._columns.pop(SNAPSHOTS, None) or _Column(path, SNAPSHOTS)
+
+    def _add_value(self, encoded: bytes) -> int:
+        code = self._codes[encoded] = len(self._values)
+        self._values.append(json_codec.loads(encoded))
+        return code
+
+    def _encode(self, value: Any) -> Tuple[int, int]:
+        """
+        :return: Tuple of the value's kind and stored integer.
+        """
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return INTEGER, value
+        encoded = json_codec.dumps(value)
+        code = self._codes.get(encoded)
+        if code is None:
+            code = self._add_value(encoded)
+            if self._dictionary_file is not None:
+                self._dictionary_file.write(encoded + b"\n")
+        return ENCODED, code
+
+    def _decode(self, kind: int, value: int) -> Any:
+        if kind == INTEGER:
+            return value
+        if kind == ENCODED:
+            return self._values[value]
+        return None
+
+    def _column(self, name: str) -> _Column:
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _Column(self.path, name)
+        return column
+
+    def ingest(self, data: dict, timestamp: Optional[int] = None, records_key: Optional[str] = None) -> int:
+        """
+        Add a snapshot, e.g. the response of `get_faction(id, ["basic"])` or `get_company(id, ["employees"])`.
+
+        :param data: Response holding the member records.
+        :param timestamp: UNIX timestamp of the snapshot. Defaults to the response's `server_time`.
+        :param records_key: Key of the member records, by default the first of `RECORDS_KEYS` in the response.
+        :return: Number of values that changed since the previous snapshot.
+        """
+        if records_key is None:
+            records_key = next((key for key in RECORDS_KEYS if key in data), None)
+            if records_key is None:
+                raise ValueError(f"Response holds none of {RECORDS_KEYS}.")
+        records = data.get(records_key) or {}
+        if isinstance(records, list):
+            records = {record.get("id"): record for record in records}
+        if timestamp is None:
+            timestamp = int(data.get("server_time") or time.time())
+
+        with self._lock:
+            if len(self._snapshots) and timestamp < self._snapshots.timestamps[len(self._snapshots) - 1]:
+                raise ValueError("Snapshots must be ingested in time order.")
+            before = sum(len(column) for column in self._columns.values())
+            present: Set[int] = set()
+            for member_id, record in records.items():
+                member_id = int(member_id)
+                present.add(member_id)
+                seen = set()
+                for field, value in flatten(record):
+                    if field in self.ignored_fields:
+                        continue
+                    seen.add(field)
+                    self._column(field).append(timestamp, member_id, *self._encode(value))
+                # Fields the record no longer has
+                for name, column in self._columns.items():
+                    if name not in seen and column.last(member_id) is not None:
+                        column.append(timestamp, member_id, MISSING, 0)
+            # Members that left
+            for column in self._columns.values():
+                for member_id in column.present_members():
+                    if member_id not in present:
+                        column.append(timestamp, member_id, MISSING, 0)
+            self._snapshots.append(timestamp, 0, INTEGER, len(self._snapshots))
+            self.flush()
+            return sum(len(column) for column in self._columns.values()) - before
+
+    @property
+    def columns(self) -> List[str]:
+        """Names of the stored fields."""
+        return sorted(self._columns)
+
+    @property
+    def snapshots(self) -> array:
+        """UNIX timestamps of all ingested snapshots."""
+        return self._snapshots.timestamps.slice(0, len(self._snapshots))
+
+    def members(self, timestamp: Optional[int] = None) -> Set[int]:
+        """
+        :param timestamp: UNIX timestamp, defaults to the latest snapshot.
+        :return: IDs of the members present at that time.
+        """
+        return set(self.state(timestamp))
+
+    def history(self, member_id: int, field: str, since: Optional[int] = None,
+                until: Optional[int] = None) -> List[Tuple[int, Any]]:
+        """
+        :param member_id: Member ID.
+        :param field: Dotted field name, e.g. "level" or "last_action.status".
+        :param since: Optional UNIX timestamp of the oldest change to return.
+        :param until: Optional UNIX timestamp of the newest change to return.
+        :return: List of (timestamp, value) changes of the member's field, oldest first. None marks the member or
+            field disappearing.
+        """
+        column = self._columns.get(field)
+        if column is None:
+            return []
+        with self._lock:
+            changes = []
+            for position in column.member_positions(member_id):
+                timestamp = column.timestamps[position]
+                if (since is None or timestamp >= since) and (until is None or timestamp <= until):
+                    changes.append((timestamp, self._decode(column.kinds[position], column.values[position])))
+            return changes
+
+    def changes(self, field: str, since: Optional[int] = None,
+                until: Optional[int] = None) -> List[Tuple[int, int, Any]]:
+        """
+        :param field: Dotted field name.
+        :param since: Optional UNIX timestamp of the oldest change to return.
+        :param until: Optional UNIX timestamp of the newest change to return.
+        :return: List of (timestamp, member ID, value) changes of the field within the range, oldest first.
+        """
+        column = self._columns.get(field)
+        if column is None:
+            return []
+        with self._lock:
+            timestamps = column.timestamps
+            start = 0 if since is None else bisect.bisect_left(timestamps, since, 0, len(column))
+            stop = len(column) if until is None else bisect.bisect_right(timestamps, until, 0, len(column))
+            decode = self._decode
+            return [(timestamp, member_id, decode(kind, value)) for timestamp, member_id, kind, value in
+                    zip(timestamps.slice(start, stop), column.members.slice(start, stop),
+                        column.kinds.slice(start, stop), column.values.slice(start, stop))]
+
+    def state(self, timestamp: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Rebuild the member records as they were at a point in time.
+
+        :param timestamp: UNIX timestamp, defaults to the latest snapshot.
+        :return: Dict of member ID to a dict of dotted field names and values.
+        """
+        records: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            for name, column in self._columns.items():
+                stop = len(column) if timestamp is None else \
+                    bisect.bisect_right(column.timestamps, timestamp, 0, len(column))
+                latest: Dict[int, Tuple[int, int]] = {}
+                for member_id, kind, value in zip(column.members.slice(0, stop), column.kinds.slice(0, stop),
+                                                  column.values.slice(0, stop)):
+                    latest[member_id] = (kind, value)
+                for member_id, (kind, value) in latest.items():
+                    if kind != MISSING:
+                        records.setdefault(member_id, {})[name] = self._decode(kind, value)
+        return records
+
+    def flush(self):
+        """
+        Write new values to disk. Called after every `ingest`.
+        """
+        # Dictionary first, so stored codes never point past its end
+        if self._dictionary_file is not None:
+            self._dictionary_file.flush()
+        for column in self._columns.values():
+            column.flush()
+        self._snapshots.flush()
+
+    def close(self):
+        with self._lock:
+            for column in self._columns.values():
+                column.close()
+            self._snapshots.close()
+            if self._dictionary_file is not None:
+                self._dictionary_file.close()
+                self._dictionary_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
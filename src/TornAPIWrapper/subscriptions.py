@@ -0,0 +1,355 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Response fields holding the data of selections that don't return a field named after themselves
+SELECTION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "user/bars": ("energy", "nerve", "happy", "life", "chain"),
+    "user/money": ("points", "cayman_bank", "vault_amount", "company_funds", "daily_networth", "money_onhand",
+                   "city_bank"),
+}
+
+# Fields holding the number of seconds until something changes, e.g. the next bar tick or a travel arrival
+HINT_SECONDS_FIELDS = frozenset({"ticktime", "time_left", "timeout", "cooldown", "drug", "medical", "booster"})
+
+# Fields counting down between polls without the data changing. They are compared as the time they run out.
+COUNTDOWN_FIELDS = HINT_SECONDS_FIELDS | {"fulltime"}
+
+# Fields holding the UNIX timestamp at which something changes, used when the timestamp lies in the future
+HINT_TIMESTAMP_FIELDS = frozenset({"timestamp", "until", "end"})
+
+# Seconds to wait after a hinted change before polling, so the API has caught up
+HINT_MARGIN = 1.0
+
+EntityKey = Tuple[str, Any]
+
+
+def selection_data(data: dict, endpoint: str, selection: str) -> Any:
+    """
+    Pick the part of a response that belongs to one selection.
+
+    :param data: Response of a request that may have included other selections.
+    :param endpoint: API endpoint.
+    :param selection: Selection.
+    :return: The selection's fields. The whole response without `server_time` if they are not known.
+    """
+    fields = SELECTION_FIELDS.get(f"{endpoint}/{selection}")
+    if fields is not None:
+        return {field: data.get(field) for field in fields}
+    if selection in data:
+        return data[selection]
+    return {field: value for field, value in data.items() if field != "server_time"}
+
+
+def _absolute_countdowns(data: Any, server_time: int) -> Any:
+    """
+    :return: Copy of the data with countdowns replaced by the UNIX timestamp at which they run out.
+    """
+    if not isinstance(data, dict):
+        return data
+    return {field: server_time + value if field in COUNTDOWN_FIELDS and type(value) is int and value > 0
+            else _absolute_countdowns(value, server_time) for field, value in data.items()}
+
+
+def change_hint(data: Any, server_time: float, depth: int = 3) -> Optional[float]:
+    """
+    Look for fields announcing when the data will change next.
+
+    :param data: Part of a response.
+    :param server_time: Server time of the response as UNIX timestamp.
+    :param depth: How many levels of nested dicts to search.
+    :return: Seconds until the earliest announced change, or None if there is none.
+    """
+    if not isinstance(data, dict) or depth < 0:
+        return None
+    hint = None
+    for field, value in data.items():
+        if isinstance(value, dict):
+            seconds = change_hint(value, server_time, depth - 1)
+        elif type(value) is not int or value <= 0:
+            continue
+        elif field in HINT_SECONDS_FIELDS:
+            seconds = value
+        elif field in HINT_TIMESTAMP_FIELDS and value > server_time:
+            seconds = value - server_time
+        else:
+            continue
+        if seconds is not None and (hint is None or seconds < hint):
+            hint = seconds
+    return hint
+
+
+class Subscription:
+    def __init__(self, endpoint: str, input_id: Any, selections: Iterable[str],
+                 callback: Callable[["Subscription", dict], None], min_interval: float, max_interval: float):
+        """
+        Selections of one entity polled by a `SubscriptionEngine`. Created with `SubscriptionEngine.subscribe`.
+
+        :param endpoint: API endpoint.
+        :param input_id: ID input for endpoint, None for the key owner.
+        :param selections: Selections to watch.
+        :param callback: Callable receiving the subscription and the response whenever the selections changed.
+        :param min_interval: Shortest time in seconds between two polls.
+        :param max_interval: Longest time in seconds between two polls.
+        """
+        self.endpoint = endpoint
+        self.input_id = input_id
+        self.selections = list(selections)
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self.interval = min_interval
+        self.due = time.monotonic()
+        self.digest: Optional[int] = None
+        self.polls = 0
+        self.changes = 0
+        self.active = True
+
+    @property
+    def entity(self) -> EntityKey:
+        return self.endpoint, self.input_id
+
+    @property
+    def change_rate(self) -> float:
+        """Share of polls that found changed data."""
+        return self.changes / self.polls if self.polls else 0.0
+
+
+class SubscriptionEngine:
+    def __init__(self, request: Callable[[str, Any, List[str]], dict], max_rate: Optional[float] = None,
+                 available: Optional[Callable[[], float]] = None, reserve: float = 0,
+                 speedup: float = 0.5, slowdown: float = 1.5):
+        """
+        Poll subscribed selections as often as they actually change.
+
+        Each subscription starts at its `min_interval`. A poll that finds changed data shortens the interval by
+        `speedup`, an unchanged one lengthens it by `slowdown`, within the subscription's bounds. Fields such as
+        bar tick times, cooldowns or travel arrival times bring the next poll forward to just after the announced
+        change. Subscriptions of one entity that are at least halfway to their next poll are fetched together in
+        one request. Polls are spaced to `max_rate` requests per minute and skipped while `available` reports no
+        budget beyond `reserve`, so polling only uses what other requests leave. Usually created with
+        `TornApiWrapper.subscribe`.
+
+        :param request: Callable fetching selections, taking the endpoint, ID and selections.
+        :param max_rate: Maximum requests per minute the engine may use. Unlimited if None.
+        :param available: Optional callable returning the number of requests left in the current budget window.
+        :param reserve: Requests of the budget the engine leaves for other callers.
+        :param speedup: Factor applied to the interval after a changed poll.
+        :param slowdown: Factor applied to the interval after an unchanged poll.
+        """
+        self.request = request
+        self.max_rate = max_rate
+        self.available = available
+        self.reserve = reserve
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.polls = 0
+        self.errors = 0
+        self.deferred = 0
+
+        self._entities: Dict[EntityKey, List[Subscription]] = {}
+        self._due: List[Tuple[float, int, EntityKey]] = []
+        self._counter = itertools.count()
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, endpoint: str, selections: Iterable[str], callback: Callable[[Subscription, dict], None],
+                  input_id: Any = None, min_interval: float = 10.0, max_interval: float = 300.0) -> Subscription:
+        """
+        Start polling selections of an entity. The callback also receives the result of the first poll.
+
+        :param endpoint: API endpoint, e.g. "user" or "faction".
+        :param selections: Selections to watch, e.g. ["bars"].
+        :param callback: Callable receiving the subscription and the response whenever the selections changed.
+            Called on the polling thread.
+        :param input_id: ID input for endpoint, None for the key owner.
+        :param min_interval: Shortest time in seconds between two polls.
+        :param max_interval: Longest time in seconds between two polls.
+        :return: The subscription.
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval.")
+        subscription = Subscription(endpoint.strip("/"), input_id, selections, callback, min_interval, max_interval)
+        with self._lock:
+            self._entities.setdefault(subscription.entity, []).append(subscription)
+            self._schedule(subscription.entity)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Stop polling a subscription.
+        """
+        with self._lock:
+            subscription.active = False
+            subscriptions = self._entities.get(subscription.entity, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._entities.pop(subscription.entity, None)
+
+    @property
+    def subscriptions(self) -> List[Subscription]:
+        with self._lock:
+            return [subscription for subscriptions in self._entities.values() for subscription in subscriptions]
+
+    def _schedule(self, entity: EntityKey):
+        """
+        Queue an entity for its earliest due subscription. Outdated heap entries are skipped when popped.
+        """
+        due = min(subscription.due for subscription in self._entities[entity])
+        heapq.heappush(self._due, (due, next(self._counter), entity))
+
+    def _pop_due(self, now: float) -> Optional[Tuple[EntityKey, List[Subscription]]]:
+        """
+        :return: The next entity to poll and its subscriptions to include, or None if nothing is due.
+        """
+        while self._due and self._due[0][0] <= now:
+            due, _, entity = heapq.heappop(self._due)
+            subscriptions = self._entities.get(entity)
+            if not subscriptions or due != min(subscription.due for subscription in subscriptions):
+                continue
+            # Subscriptions at least halfway to their next poll ride along in the same request
+            batch = [subscription for subscription in subscriptions
+                     if subscription.due - now <= subscription.interval / 2]
+            return entity, batch
+        return None
+
+    def _has_budget(self) -> bool:
+        return self.available is None or self.available() > self.reserve
+
+    def run_pending(self) -> int:
+        """
+        Poll the entities that are due now, within the rate and budget limits.
+
+        :return: Number of requests made.
+        """
+        requests_made = 0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now < self._next_request:
+                break
+            with self._lock:
+                if not self._due or self._due[0][0] > now:
+                    break
+                if not self._has_budget():
+                    self.deferred += 1
+                    break
+                popped = self._pop_due(now)
+            if popped is None:
+                continue
+            if self.max_rate:
+                self._next_request = now + 60.0 / self.max_rate
+            self.poll(*popped)
+            requests_made += 1
+        return requests_made
+
+    def poll(self, entity: EntityKey, subscriptions: List[Subscription]):
+        """
+        Fetch the selections of some subscriptions of one entity in one request and notify those that changed.
+
+        :param entity: Endpoint and ID of the entity.
+        :param subscriptions: Subscriptions of the entity to include.
+        """
+        endpoint, input_id = entity
+        selections = sorted({selection for subscription in subscriptions for selection in subscription.selections})
+        try:
+            data = self.request(endpoint, input_id, selections)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Polling %s %s failed: %s", endpoint, selections, e)
+            data = None
+        self.polls += 1
+
+        now = time.monotonic()
+        changed = []
+        with self._lock:
+            for subscription in subscriptions:
+                if data is None:
+                    # Back off as if nothing changed, so a failing entity doesn't eat the budget
+                    subscription.interval = min(subscription.max_interval, subscription.interval * self.slowdown)
+                    subscription.due = now + subscription.interval
+                    continue
+                changed_now = self._update(subscription, data, now)
+                if changed_now:
+                    changed.append(subscription)
+            if entity in self._entities:
+                self._schedule(entity)
+
+        for subscription in changed:
+            if not subscription.active:
+                continue
+            try:
+                subscription.callback(subscription, data)
+            except Exception as e:
+                logger.warning("Subscription callback for %s %s failed: %s", endpoint, subscription.selections, e)
+
+    def _update(self, subscription: Subscription, data: dict, now: float) -> bool:
+        """
+        Adapt a subscription's interval to a new response and schedule its next poll.
+
+        :return: Whether the subscription's data changed.
+        """
+        server_time = data.get("server_time") or int(time.time())
+        parts = {selection: selection_data(data, subscription.endpoint, selection)
+                 for selection in subscription.selections}
+        digest = hash(json_codec.dumps(_absolute_countdowns(parts, server_time)))
+        changed = digest != subscription.digest
+        first = subscription.digest is None
+        subscription.digest = digest
+        subscription.polls += 1
+        if changed and not first:
+            subscription.changes += 1
+            subscription.interval = max(subscription.min_interval, subscription.interval * self.speedup)
+        elif not changed:
+            subscription.interval = min(subscription.max_interval, subscription.interval * self.slowdown)
+
+        delay = subscription.interval
+        hint = change_hint(parts, server_time)
+        if hint is not None:
+            delay = min(delay, max(subscription.min_interval, hint + HINT_MARGIN))
+        subscription.due = now + delay
+        return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            with self._lock:
+                next_due = self._due[0][0] if self._due else None
+            now = time.monotonic()
+            wake = max(next_due, self._next_request) if next_due is not None else now + 1.0
+            # Wake up at least once a second to notice new subscriptions and freed budget
+            self._stop.wait(min(max(wake - now, 0.01), 1.0))
+
+    def start(self) -> "SubscriptionEngine":
+        """
+        Start polling on a background thread.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="torn-api-subscriptions", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop polling.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -23,10 +23,12 @@ SOFTWARE.
 """
 
 import logging
-import time
-import requests
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 import os
+from . import json_codec
+
+if TYPE_CHECKING:
+    import requests
 
 
 class TornApiError(Exception):
@@ -44,6 +46,8 @@ class TornApiErrorHandler:
 
     Methods:
     - api_error_handler(response) -> dict: Handle Torn API errors.
+    - check_response_content(content) -> dict: Decode a raw response body and handle Torn API errors.
+    - check_response_data(data) -> dict: Handle Torn API errors in already decoded response data.
     """
     error_codes = {
         0: "Unknown error: Unhandled error, should not occur.",
@@ -71,13 +75,16 @@ class TornApiErrorHandler:
         18: "API key has been paused by the owner."
     }
 
-    def __init__(self, log_level: int = logging.INFO, max_retries: int = 3, retry_delay: float = 1.0):
-        # Configure logging
-        log_level = os.getenv('TORN_API_LOG_LEVEL', log_level)
-        logging.basicConfig(level=int(log_level), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def __init__(self, log_level: int = logging.INFO, max_retries: int = 3, retry_delay: float = 1.0,
+                 configure_logging: bool = True):
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(int(log_level))
+        if configure_logging:
+            # Configure logging
+            log_level = os.getenv('TORN_API_LOG_LEVEL', log_level)
+            logging.basicConfig(level=int(log_level), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            self.logger.setLevel(int(log_level))
 
+        # Unused, kept so existing callers don't break. Retries are configured with `RetryPolicy` on the wrapper.
         self.max_retries = max_retries
         self.retry_delay = retry_delay
 
@@ -86,7 +93,7 @@ class TornApiErrorHandler:
         self.logger.error(f"API Error Code {error_code}: {error_message}")
         raise TornApiError(error_code, error_message)
 
-    def api_error_handler(self, response: requests.Response) -> Dict:
+    def api_error_handler(self, response: "requests.Response") -> Dict:
         """
         Handle Torn API errors.
 
@@ -94,32 +101,42 @@ class TornApiErrorHandler:
         :return: Json-encoded data.
         :raises TornApiError: If an API error is encountered.
         """
-        self.logger.debug(f"Handling response with status code: {response.status_code}")
+        self.logger.debug("Handling response with status code: %s", response.status_code)
 
         if response.status_code == 200:
-            data = response.json()
-            self.logger.debug(f"Response data: {data}")
-
-            if "error" in data:
-                error_code = data["error"]["code"]
-                self._handle_error(error_code)
-            return data
+            return self.check_response_content(response.content)
         else:
             self.logger.error(f"HTTP Error {response.status_code}: {response.text}")
             response.raise_for_status()
 
-    def _retry_request(self, request_func, *args, **kwargs):
-        attempts = 0
-        while attempts < self.max_retries:
-            try:
-                response = request_func(*args, **kwargs)
-                return self.api_error_handler(response)
-            except TornApiError as e:
-                if e.error_code == 17:  # Temporary error
-                    attempts += 1
-                    self.logger.warning(f"Temporary error encountered. Retrying {attempts}/{self.max_retries}...")
-                    time.sleep(self.retry_delay)
-                else:
-                    raise
-        self.logger.error(f"Max retries reached. Failed to handle request.")
-        raise TornApiError(17, "Backend error occurred, please try again.")
+    def check_response_content(self, content: bytes) -> Dict:
+        """
+        Decode a raw response body and handle Torn API errors.
+
+        The body is decoded once with the fastest available JSON backend (see `json_codec`). Error responses are
+        a top-level "error" object, so spotting one afterwards is a single key lookup rather than a scan.
+
+        :param content: Raw response body.
+        :return: Json-encoded data.
+        :raises TornApiError: If an API error is encountered.
+        """
+        return self.check_response_data(json_codec.loads(content))
+
+    def check_response_data(self, data: Dict) -> Dict:
+        """
+        Handle Torn API errors in already decoded response data.
+
+        Used by clients that already hold decoded data.
+
+        :param data: Json-decoded response data.
+        :return: Json-encoded data.
+        :raises TornApiError: If an API error is encountered.
+        """
+        # Payloads can be hundreds of KB, only format them when the record is actually emitted
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Response data: %s", data)
+
+        if "error" in data:
+            error_code = data["error"]["code"]
+            self._handle_error(error_code)
+        return data
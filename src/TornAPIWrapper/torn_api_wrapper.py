@@ -21,16 +21,79 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-import requests
-from typing import Union, List, Dict
-import time
-from collections import deque
+from typing import TYPE_CHECKING, Union, List, Dict, Optional, Tuple, Iterable, Iterator, Callable
 import logging
 import os
 import json
-from .torn_api_error_handler import TornApiErrorHandler
-from .cache import Cache
-from colorama import Fore, Style
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from .torn_api_error_handler import TornApiErrorHandler, TornApiError
+from . import json_codec
+from .metrics import Metrics
+from .key_pool import KeyPool
+from .rate_limiter import RateLimiter, SQLiteRateLimiter
+from .cache import Cache, DiskCache, DEFAULT_PUBLIC_SELECTIONS, make_cache_key, is_public_request
+from .coalescer import SelectionCoalescer
+from .single_flight import SingleFlight
+from .bulk import BulkFetcher, BulkResult
+from .pagination import paginate
+from .scheduler import PriorityScheduler, Ticket, BULK
+from .retry import RetryPolicy, CircuitBreaker, is_key_specific_error
+from .shared_context import SharedContext, key_hash
+
+if TYPE_CHECKING:
+    # Imported on first use, so importing the module and constructing a wrapper doesn't pay for them
+    import requests
+    from .cassette import Cassette
+    from .market_watcher import MarketWatcher, MarketDelta
+    from .subscriptions import Subscription, SubscriptionEngine
+
+
+def build_request_params(api_key: str, selections: List[str] = None, limit: int = None, sort: str = None,
+                         stat: str = None, cat: int = None, log: int = None, from_unix: int = None,
+                         to_unix: int = None, unix_timestamp: int = None,
+                         comment: str = None) -> Dict[str, Union[str, int]]:
+    """
+    Build the query parameters for a Torn City API request.
+
+    :param api_key: API key used to authenticate the request, or None to leave it out.
+    :param selections: List of selections from available fields.
+    :param limit: Limit amount of results.
+    :param sort: Sort results.
+    :param stat: Select a stat to view.
+    :param cat: Filter logs based on the Torn log categories.
+    :param log: Filter logs based on the Torn log types.
+    :param from_unix: UNIX timestamp to filter results, including entries on or after this timestamp.
+    :param to_unix: UNIX timestamp to filter results, including entries on or before this timestamp.
+    :param unix_timestamp: UNIX timestamp to get specific stat from date.
+    :param comment: Optional comment shown in the key's API log.
+    :return: Query parameters.
+    """
+    params: Dict[str, Union[str, int]] = {"selections": ','.join(selections)} if selections else {}
+    if api_key is not None:
+        params["key"] = api_key
+    if limit is not None:
+        params["limit"] = limit
+    if sort is not None:
+        params["sort"] = sort
+    if stat is not None:
+        params["stat"] = stat
+    if cat is not None:
+        params["cat"] = cat
+    if log is not None:
+        params["log"] = log
+    if from_unix is not None:
+        params["from"] = from_unix
+    if to_unix is not None:
+        params["to"] = to_unix
+    if unix_timestamp is not None:
+        params["timestamp"] = unix_timestamp
+    if comment is not None:
+        params["comment"] = comment
+    return params
 
 
 class TornApiWrapper:
@@ -40,106 +103,381 @@ class TornApiWrapper:
 
     base_url = "https://api.torn.com"
     request_limit = 100  # Max 100 requests per minute
-    max_log_entries = 1000  # Maximum number of entries to keep in the log file
 
-    def __init__(self, api_key: str, log_level=logging.INFO, log_directory: str = None, cache_ttl=300):
+    def __init__(self, api_key: Union[str, List[str], KeyPool], log_level=logging.INFO, log_directory: str = None,
+                 cache_ttl=300, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 timeout: Union[float, Tuple[float, float]] = (5.0, 30.0), keep_alive: bool = True,
+                 session: Optional["requests.Session"] = None, rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[Cache] = None, persistent_cache: bool = False, coalesce_window: float = 0,
+                 stale_ttl: float = 0, refresh_ahead: float = 0, refresh_min_hits: int = 3,
+                 refresh_spare_capacity: float = 0.5, refresh_workers: int = 2,
+                 reserved_shares: Optional[Dict[str, float]] = None, retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, metrics: Optional[Metrics] = None,
+                 color_logs: bool = False, cassette: Optional["Cassette"] = None,
+                 context: Optional[SharedContext] = None):
         """
         Initialize the TornApiWrapper with the provided API key, log level, and optional log directory.
 
-        :param api_key: API key used to authenticate API requests.
+        :param api_key: API key used to authenticate API requests. Pass a list of keys or a `KeyPool` to spread
+            requests across several keys, each with its own request budget.
         :param log_level: Logging level.
-        :param log_directory: Optional directory to store the request log file.
-            Defaults to a hidden folder in the user's home directory.
-        :param cache_ttl: Time-to-live for the cache in seconds.
+        :param log_directory: Optional directory to store the request log database, which lets every process on
+            the host share the request budget of a key. Defaults to a hidden folder in the user's home directory.
+        :param cache_ttl: Default time-to-live for the cache in seconds.
+        :param pool_connections: Number of connection pools to cache in the HTTP session.
+        :param pool_maxsize: Maximum number of connections kept alive per pool, i.e. the number of threads
+            that can talk to the API concurrently without opening new connections.
+        :param pool_block: Whether to block when the pool has no free connection instead of opening a new one.
+        :param timeout: Request timeout in seconds, either a single value or a (connect, read) tuple.
+        :param keep_alive: Whether to keep connections open between requests.
+        :param session: Optional preconfigured `requests.Session`. It is used as-is and is not closed by `close()`.
+            A `cassette` is mounted on it until `close()`.
+        :param rate_limiter: Optional rate limiter for single-key requests. Defaults to a sliding window of
+            `request_limit` requests per minute, stored in the request log database.
+        :param cache: Optional preconfigured `Cache`, e.g. with custom size limits or time-to-live rules. It may be
+            shared by wrappers with different keys, private responses are only served to wrappers using the same keys.
+        :param persistent_cache: Whether to back the default cache with a `DiskCache` in the log directory, so
+            slow-changing data survives restarts and is shared with other processes on the host.
+        :param coalesce_window: Time in seconds to hold a request so concurrent requests for other selections of
+            the same entity can be merged into it. Disabled when 0.
+        :param stale_ttl: How long in seconds an expired cache entry is still served immediately while a background
+            thread refreshes it. Disabled when 0. Ignored if `cache` is given, set `Cache.stale_ttl` instead.
+        :param refresh_ahead: Fraction of an entry's time-to-live before expiry in which frequently read entries
+            are refreshed in the background, e.g. 0.2 for the last 20%. Disabled when 0.
+        :param refresh_min_hits: Number of reads after which an entry counts as frequently read.
+        :param refresh_spare_capacity: Fraction of the request budget that must be free for a refresh ahead.
+        :param refresh_workers: Number of background threads for refreshes.
+        :param reserved_shares: Enables priority scheduling of single-key requests when given. Maps the priority
+            classes "interactive", "normal" and "bulk" to the share of the budget lower classes may not use, merged
+            over `scheduler.DEFAULT_RESERVED_SHARES`. Pass an empty dict for the defaults. See `priority()`.
+        :param retry_policy: Retry policy for failed requests. Defaults to `RetryPolicy()`, which retries network
+            errors, HTTP 5xx and temporary API errors up to 3 times with exponential backoff and jitter. Pass
+            `RetryPolicy(max_retries=0)` to disable retries.
+        :param circuit_breaker: Circuit breaker that stops using a key after errors such as 8, 9, 10, 13 or 18.
+            Defaults to `CircuitBreaker()`.
+        :param metrics: Metrics to record request latency, bytes received, rate limit waits, errors and retries
+            in. Defaults to a new `Metrics()`, available as `metrics`. Pass one instance to several wrappers to
+            aggregate them.
+        :param color_logs: Whether to color console log records by level. Off by default, so records that are
+            emitted cost no more than plain logging.
+        :param cassette: Records responses to, or replays them from, a `Cassette` file at the transport level.
+            In replay mode no request reaches the network, and rate limits and retry delays are skipped.
+        :param context: Lean construction for short-lived wrappers. The session, cache, rate limiters and metrics
+            are taken from the `SharedContext` when first needed, logging is not configured and nothing is created
+            on disk. Parameters configuring those shared parts are then ignored, except for explicitly passed
+            `session`, `rate_limiter`, `cache` and `metrics` objects. A wrapper with a `cassette` uses a session of
+            its own. Public responses in the shared cache are served to all wrappers, private ones only to wrappers
+            using the same keys.
         """
-        self.api_key = api_key
-        self.api_comment = None
-        self.api_error_handler = TornApiErrorHandler().api_error_handler
-
-        # Determine the directory for storing the request log file
-        if log_directory is None:
+        self.context = context
+        self.logger = logging.getLogger(__name__)
+        if context is None:
+            # Configure logging
+            logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            self.logger.setLevel(log_level)
+        if color_logs:
+            from .color_logging import enable_color_logging
+            enable_color_logging()
+
+        # Determine the directory for storing the request log database
+        if context is not None:
+            self.log_directory = log_directory or context.log_directory
+        elif log_directory is None:
             self.log_directory = os.path.join(os.path.expanduser("~"), ".torn_api_wrapper")
         else:
             self.log_directory = log_directory
 
-        self.request_log_file = os.path.join(self.log_directory, "request_log.json")
-
-        # Configure logging
-        logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(log_level)
+        self.request_log_file = os.path.join(self.log_directory, "request_log.db") if self.log_directory else None
 
-        # Ensure the log directory exists
-        os.makedirs(self.log_directory, exist_ok=True)
+        # Ensure the log directory exists, a context creates it only once a database is needed
+        if context is None:
+            os.makedirs(self.log_directory, exist_ok=True)
 
-        # Initialize request times from file, ensuring old entries are removed
-        self.request_times = deque(self._load_request_times(), maxlen=self.max_log_entries)
+        if isinstance(api_key, str):
+            self.key_pool = None
+            self.api_key = api_key
+        else:
+            rate_limiter_factory = context.rate_limiter if context is not None else self._create_rate_limiter
+            self.key_pool = api_key if isinstance(api_key, KeyPool) else KeyPool(
+                api_key, self.request_limit, rate_limiter_factory=rate_limiter_factory)
+            self.api_key = self.key_pool.keys[0].api_key
+        self.api_comment = None
+        error_handler = context.error_handler if context is not None else TornApiErrorHandler()
+        self.api_error_handler = error_handler.api_error_handler
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.timeout = timeout
+
+        # Shared HTTP session so connections to the API are reused across calls and threads. A cassette would
+        # answer the requests of every wrapper on a context's session, so it gets a session of its own.
+        self._owns_session = session is None and (context is None or cassette is not None)
+        self._session = session
+        if self._owns_session:
+            self._session = self._create_session(pool_connections, pool_maxsize, pool_block, keep_alive)
+        self.cassette = cassette
+        # Adapters replaced by the cassette on a session passed in, put back by `close()`
+        self._replaced_adapters = {}
+        if cassette is not None:
+            from .cassette import CassetteAdapter
+            for prefix in ("https://", "http://"):
+                if not self._owns_session:
+                    self._replaced_adapters[prefix] = self.session.adapters.get(prefix)
+                self.session.mount(prefix, CassetteAdapter(cassette, self.session.get_adapter(prefix)))
+            if cassette.replaying and self._owns_session:
+                # Nothing reaches the network, skip requests' per-call scan of the environment for proxy settings
+                self.session.trust_env = False
+
+        # Request budget shared with other processes using the same key and log directory
+        self._owns_rate_limiter = rate_limiter is None and context is None
+        self._rate_limiter = rate_limiter
+        if self._owns_rate_limiter:
+            self._rate_limiter = self._create_rate_limiter(self.api_key)
+        self.scheduler = PriorityScheduler(self.rate_limiter, reserved_shares) if reserved_shares is not None else None
 
         # Initialize cache
-        self.cache = Cache(ttl=cache_ttl)
+        self._owns_cache = cache is None and context is None
+        if self._owns_cache:
+            disk_cache = DiskCache(os.path.join(self.log_directory, "cache.db")) if persistent_cache else None
+            cache = Cache(ttl=cache_ttl, disk_cache=disk_cache, stale_ttl=stale_ttl)
+        self._cache = cache
+        # A cache passed in or taken from a context, and a disk tier, may also hold other keys' responses, so
+        # private entries are kept apart per key
+        shares_context_cache = context is not None and cache is None
+        self._cache_partition = None
+        if not self._owns_cache or self._cache.disk_cache is not None:
+            keys = [self.api_key] if self.key_pool is None else [key.api_key for key in self.key_pool.keys]
+            self._cache_partition = key_hash(",".join(keys))
+
+        # Callers of other wrappers sharing the cache may wait on the same request, keys keep private data apart.
+        # They make the request again with their own keys if it failed because of the other wrapper's key.
+        self.single_flight = context.single_flight if shares_context_cache else SingleFlight()
+        self._share_error = (lambda error: not is_key_specific_error(error)) if shares_context_cache else None
+        self._tickets: Dict[str, Ticket] = context.tickets if shares_context_cache else {}
+        self.refresh_ahead = refresh_ahead
+        self.refresh_min_hits = refresh_min_hits
+        self.refresh_spare_capacity = refresh_spare_capacity
+        self.refresh_workers = refresh_workers
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        if metrics is not None:
+            self.metrics = metrics
+        else:
+            self.metrics = context.metrics if context is not None else Metrics()
+        # A context reports its own cache once, instead of once per wrapper
+        self._cache_collector = self._cache.stats if self._cache is not None else None
+        if self._cache_collector is not None:
+            self.metrics.add_collector("cache", self._cache_collector)
+        self.coalescer = SelectionCoalescer(self._fetch_and_cache, coalesce_window) if coalesce_window > 0 else None
+        self.subscriptions: Optional["SubscriptionEngine"] = None
+
+        self.logger.info("TornApiWrapper initialized with provided API key.")
+
+    @property
+    def session(self) -> "requests.Session":
+        """HTTP session used for API requests."""
+        if self._session is None:
+            self._session = self.context.session
+        return self._session
+
+    @session.setter
+    def session(self, session: "requests.Session"):
+        self._session = session
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Rate limiter for single-key requests."""
+        if self._rate_limiter is None:
+            self._rate_limiter = self.context.rate_limiter(self.api_key)
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: RateLimiter):
+        self._rate_limiter = rate_limiter
+
+    @property
+    def cache(self) -> Cache:
+        """Cache of API responses."""
+        if self._cache is None:
+            self._cache = self.context.cache
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Cache):
+        self._cache = cache
+
+    def _cache_key(self, endpoint: str, input_id: Optional[int], query: Dict[str, Union[str, int]]) -> str:
+        """
+        :return: Cache key of a request. If the cache isn't owned by the wrapper or has a disk tier, keys of private
+            requests are prefixed with a hash of the API key.
+        """
+        cache_key = make_cache_key(endpoint, input_id, query)
+        if not self._cache_partition:
+            return cache_key
+        selections = [selection for selection in str(query.get("selections") or "").split(",") if selection]
+        public_selections = self.context.public_selections if self.context is not None else DEFAULT_PUBLIC_SELECTIONS
+        if is_public_request(endpoint, input_id, selections, public_selections):
+            return cache_key
+        return f"{self._cache_partition}:{cache_key}"
 
-        self.logger.info(Fore.MAGENTA + "TornApiWrapper initialized with provided API key." + Style.RESET_ALL)
+    @staticmethod
+    def _create_session(pool_connections: int, pool_maxsize: int, pool_block: bool,
+                        keep_alive: bool) -> "requests.Session":
+        """
+        Create the HTTP session used for all API requests.
 
-    def _load_request_times(self):
+        :param pool_connections: Number of connection pools to cache.
+        :param pool_maxsize: Maximum number of connections to keep per pool.
+        :param pool_block: Whether to block when no connection is available.
+        :param keep_alive: Whether to keep connections open between requests.
+        :return: Configured session.
         """
-        Load request times from the log file, removing entries older than 1 hour.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive" if keep_alive else "close",
+        })
+        return session
+
+    def close(self):
+        """
+        Close the HTTP session and release its pooled connections and the databases opened by the wrapper.
+        """
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=True)
+            self._refresh_executor = None
+        if self.subscriptions is not None:
+            self.subscriptions.stop()
+        if self._cache_collector is not None:
+            # Don't keep reporting, and keeping alive, the cache of a closed wrapper in a shared `Metrics`
+            self.metrics.remove_collector("cache", self._cache_collector)
+            self._cache_collector = None
+        if self._owns_session:
+            self.session.close()
+            self.logger.debug("HTTP session closed.")
+        for prefix, adapter in self._replaced_adapters.items():
+            if adapter is None:
+                self.session.adapters.pop(prefix, None)
+            else:
+                self.session.mount(prefix, adapter)
+        self._replaced_adapters = {}
+        if self._owns_rate_limiter:
+            self.rate_limiter.close()
+        if self._owns_cache and self.cache.disk_cache is not None:
+            self.cache.disk_cache.close()
+        if self.cassette is not None:
+            self.cassette.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create_rate_limiter(self, api_key: str) -> RateLimiter:
+        """
+        Create the rate limiter for a key, backed by the request log database.
 
-        :return: List of request timestamps.
+        :param api_key: API key the limiter budgets for. Only a hash of the key is stored.
+        :return: Rate limiter.
         """
-        try:
-            if os.path.exists(self.request_log_file):
-                with open(self.request_log_file, "r") as file:
-                    request_times = json.load(file)
-                    # Remove entries older than 1 hour
-                    current_time = time.time()
-                    request_times = [t for t in request_times if t >= current_time - 3600]
-                    self.logger.info(Fore.GREEN + "Loaded request times from file." + Style.RESET_ALL)
-                    return request_times
-        except (IOError, json.JSONDecodeError) as e:
-            self.logger.error(Fore.RED + f"Error loading request times: {e}" + Style.RESET_ALL)
-        return []
-
-    def _save_request_times(self):
-        """
-        Save the current request times to the log file.
+        bucket = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        return SQLiteRateLimiter(self.request_log_file, bucket=bucket, limit=self.request_limit, period=60)
+
+    def priority(self, priority: str, timeout: Optional[float] = None):
+        """
+        Context manager running the current thread's requests with a priority class, e.g.
+        `with taw.priority("interactive", timeout=5): taw.get_user(...)`.
+
+        Has no effect unless the wrapper was created with `reserved_shares`.
+
+        :param priority: Priority class, one of "interactive", "normal" or "bulk".
+        :param timeout: Optional time in seconds after which waiting requests raise `RequestDropped`.
+        """
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.priority(priority, timeout)
+
+    def _check_request_limit(self, ticket: Optional[Ticket] = None):
+        """
+        Claim a slot from the rate limiter, through the priority scheduler if enabled.
+        If the limit is exceeded, wait exactly until the next slot frees up.
+
+        :param ticket: Priority class and deadline of the request. Defaults to those of the current thread.
+        """
+        if self.scheduler is not None:
+            if ticket is None:
+                ticket = Ticket(*self.scheduler.current())
+            waited = self.scheduler.acquire(ticket=ticket)
+            self.metrics.record_wait(waited)
+            if waited:
+                self.logger.info("Waited %.2fs for a %s request slot.", waited, ticket.priority)
+            return
+        if self.rate_limiter.try_acquire():
+            self.metrics.record_wait(0.0)
+            self.logger.debug("Request limit check passed.")
+            return
+        wait_time = self.rate_limiter.wait_time()
+        self.logger.warning("Request limit exceeded: %s requests per minute. Delaying request for %.2fs...",
+                            self.request_limit, wait_time)
+        start = time.monotonic()
+        self.rate_limiter.acquire()
+        self.metrics.record_wait(time.monotonic() - start)
+
+    def _rate_limit_wait(self, pooled_key=None) -> float:
+        """
+        :param pooled_key: Key from the key pool used for the request, if any.
+        :return: Seconds until the limiter of the key used for a request has a free slot.
+        """
+        rate_limiter = pooled_key.rate_limiter if pooled_key is not None else self.rate_limiter
+        return rate_limiter.wait_time()
+
+    @staticmethod
+    def _retry_after(response: Optional["requests.Response"]) -> Optional[float]:
         """
+        :param response: Response of a failed request, if one was received.
+        :return: Value of the `Retry-After` header in seconds, if present.
+        """
+        if response is None:
+            return None
         try:
-            with open(self.request_log_file, "w") as file:
-                json.dump(list(self.request_times), file)
-                self.logger.info(Fore.GREEN + "Saved request times to file." + Style.RESET_ALL)
-        except IOError as e:
-            self.logger.error(Fore.RED + f"Error saving request times: {e}" + Style.RESET_ALL)
-
-    def _check_request_limit(self):
-        """
-        Check if the number of requests in the last minute exceeds the limit.
-        If the limit is exceeded, delay further requests.
-        """
-        current_time = time.time()
-        # Remove requests older than 60 seconds
-        while self.request_times and self.request_times[0] < current_time - 60:
-            self.request_times.popleft()
-        request_count = len(self.request_times)
-        self.logger.info(Fore.CYAN + f"Number of requests in the last minute: {request_count}" + Style.RESET_ALL)
-        if request_count >= self.request_limit:
-            self.logger.warning(
-                Fore.YELLOW + "Request limit exceeded: 100 requests per minute. Delaying requests..." + Style.RESET_ALL)
-            while len(self.request_times) >= self.request_limit:
-                time.sleep(1)
-                current_time = time.time()
-                while self.request_times and self.request_times[0] < current_time - 60:
-                    self.request_times.popleft()
-        self.logger.debug(
-            Fore.GREEN + f"Request limit check passed with {len(self.request_times)} "
-                         f"requests in the last minute." + Style.RESET_ALL)
-
-    def _record_request(self):
-        """
-        Record a new request timestamp.
-        """
-        self.request_times.append(time.time())
-        self.logger.debug(Fore.GREEN + f"Request recorded at {self.request_times[-1]}." + Style.RESET_ALL)
-        self._save_request_times()  # Save updated request times
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _transport_error_code(error: "requests.RequestException") -> str:
+        """
+        :param error: Exception raised while sending a request.
+        :return: Error code used for the exception in metrics, e.g. "http_503", "timeout" or "connection".
+        """
+        import requests
+
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return f"http_{error.response.status_code}"
+        if isinstance(error, requests.Timeout):
+            return "timeout"
+        return "connection"
+
+    def _send_request(self, url: str, params: Dict[str, Union[str, int]]) -> "requests.Response":
+        """
+        Send a GET request to the API over the shared session.
+
+        :param url: Full request URL.
+        :param params: Query parameters.
+        :return: Response object.
+        """
+        self.logger.debug("Request params: %s", params)
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        self.logger.info("Received response with status code: %s", response.status_code)
+        return response
 
     @staticmethod
     def pretty_print(data: dict):
@@ -151,6 +489,7 @@ class TornApiWrapper:
         try:
             print(json.dumps(data, indent=4, sort_keys=True))
         except (TypeError, ValueError) as e:
+            from colorama import Fore, Style
             print(Fore.RED + f"Invalid JSON data: {e}" + Style.RESET_ALL)
 
     def api_request(self, endpoint: str, input_id: int = None, selections: List[str] = None, limit: int = None,
@@ -172,47 +511,193 @@ class TornApiWrapper:
         :param unix_timestamp: UNIX timestamp to get specific stat from date.
         :return: Json-encoded data.
         """
-        cache_key = f"{endpoint}-{input_id}-{selections}-{limit}-{sort}-{stat}-{cat}-{log}"
-
-        cached_response = self.cache.get(cache_key)
-        if cached_response:
-            self.logger.info(Fore.GREEN + "Cache hit. Returning cached response." + Style.RESET_ALL)
-            return cached_response
-
-        self.logger.info(
-            Fore.MAGENTA + f"Making API request to endpoint: {endpoint} with input_id: {input_id}" + Style.RESET_ALL)
-        self._check_request_limit()  # Check if request limit is exceeded
-        endpoint = f"{endpoint}{'/' + str(input_id) if input_id else ''}"
-        params: Dict[str, Union[str, int]] = {"selections": ','.join(selections)} if selections else {}
-        params["key"] = self.api_key
-        if limit is not None:
-            params["limit"] = limit
-        if sort is not None:
-            params["sort"] = sort
-        if stat is not None:
-            params["stat"] = stat
-        if cat is not None:
-            params["cat"] = cat
-        if log is not None:
-            params["log"] = log
-        if from_unix is not None:
-            params["from"] = from_unix
-        if to_unix is not None:
-            params["to"] = to_unix
-        if unix_timestamp is not None:
-            params["timestamp"] = unix_timestamp
-        if self.api_comment is not None:
-            params["comment"] = self.api_comment
-
-        self.logger.debug(Fore.GREEN + f"Request params: {params}" + Style.RESET_ALL)
-        response = requests.get(f"{self.base_url}{endpoint}", params=params)
-        self._record_request()  # Record the request
-        self.logger.info(Fore.MAGENTA + f"Received response with status code: {response.status_code}" + Style.RESET_ALL)
-
-        response_data = self.api_error_handler(response)
-        self.cache.set(cache_key, response_data)
+        query = build_request_params(None, selections, limit, sort, stat, cat, log, from_unix, to_unix,
+                                     unix_timestamp, self.api_comment)
+        cache_key = self._cache_key(endpoint, input_id, query)
+        # Priority of the calling thread, passed on explicitly as the request may be made by another caller's thread
+        ticket = Ticket(*self.scheduler.current()) if self.scheduler is not None else None
+
+        def fetch(ticket: Optional[Ticket] = None) -> dict:
+            coalescable = self.coalescer is not None and selections and set(query) <= {"selections", "comment"}
+            if coalescable:
+                response_data = self.coalescer.request(endpoint, input_id, selections)
+                # The response is shared with the batch, encode this caller's part so the cache counts its real size
+                raw = json_codec.dumps(response_data)
+            else:
+                response_data, raw = self._fetch(endpoint, input_id, selections, query, ticket)
+
+            self.cache.set(cache_key, response_data, ttl=self.cache.ttl_for(endpoint, selections), raw=raw)
+            return response_data
+
+        def load() -> dict:
+            # A previous leader may have stored the data between the cache lookup below and this call
+            entry = self.cache.get_entry(cache_key)
+            if entry is not None:
+                return entry.value
+            if ticket is None:
+                return fetch()
+            # Callers joining while the request waits for a slot raise its priority to theirs
+            self._tickets[cache_key] = ticket
+            try:
+                return fetch(ticket)
+            finally:
+                self._tickets.pop(cache_key, None)
+
+        entry = self.cache.get_entry(cache_key, allow_stale=self.cache.stale_ttl > 0)
+        if entry is not None:
+            now = time.time()
+            if entry.is_stale(now):
+                self.logger.info("Serving stale cached response while refreshing.")
+                self._schedule_refresh(cache_key, fetch)
+            elif (self.refresh_ahead and entry.hits >= self.refresh_min_hits
+                  and entry.expires - now < entry.ttl * self.refresh_ahead and self._has_spare_capacity()):
+                self._schedule_refresh(cache_key, fetch)
+            else:
+                self.logger.info("Cache hit. Returning cached response.")
+            return entry.value
+
+        # Callers asking for the same data while it is being fetched share the result of one request
+        leader_ticket = self._tickets.get(cache_key) if ticket is not None else None
+        if leader_ticket is not None:
+            leader_ticket.promote(ticket.priority, ticket.deadline)
+        return self.single_flight.do(cache_key, load, self._share_error)
+
+    def _has_spare_capacity(self) -> bool:
+        """
+        Check whether enough of the request budget is free for proactive refreshes.
+
+        :return: True if at least `refresh_spare_capacity` of the budget is unused.
+        """
+        available, limit = self._request_budget()
+        return available >= limit * self.refresh_spare_capacity
+
+    def _request_budget(self) -> Tuple[int, int]:
+        """
+        :return: Tuple of the requests left in the current window and the total budget, over all keys.
+        """
+        if self.key_pool is None:
+            return self.rate_limiter.available(), self.request_limit
+        keys = self.key_pool.available_keys()
+        return sum(k.rate_limiter.available() for k in keys), len(self.key_pool) * self.key_pool.request_limit
+
+    def _schedule_refresh(self, cache_key: str, load):
+        """
+        Refresh a cache entry on a background thread, unless a refresh for it is already running.
+
+        :param cache_key: Cache key of the entry.
+        :param load: Function fetching and caching the data.
+        """
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                            thread_name_prefix="torn-api-refresh")
+
+        def refresh():
+            try:
+                with self.priority(BULK):
+                    self.single_flight.do(cache_key, load, self._share_error)
+                self.logger.debug("Refreshed cache entry %s.", cache_key)
+            except Exception as e:
+                self.logger.warning("Background refresh of %s failed: %s", cache_key, e)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(cache_key)
+
+        self._refresh_executor.submit(refresh)
+
+    def _fetch_and_cache(self, endpoint: str, input_id: Optional[int], selections: List[str]) -> dict:
+        """
+        Fetch selections without looking at the cache, and cache the response. Used for the merged selections of
+        a coalesced batch and for subscription polls.
+
+        :param endpoint: API endpoint.
+        :param input_id: ID input for endpoint.
+        :param selections: List of selections from available fields.
+        :return: Json-encoded data.
+        """
+        query = build_request_params(None, selections, comment=self.api_comment)
+        response_data, raw = self._fetch(endpoint, input_id, selections, query)
+        self.cache.set(self._cache_key(endpoint, input_id, query), response_data,
+                       ttl=self.cache.ttl_for(endpoint, selections), raw=raw)
         return response_data
 
+    def _fetch(self, endpoint: str, input_id: Optional[int], selections: Optional[List[str]],
+               query: Dict[str, Union[str, int]], ticket: Optional[Ticket] = None) -> Tuple[dict, bytes]:
+        """
+        Make the HTTP request for an API call, respecting the request budget.
+
+        :param endpoint: API endpoint.
+        :param input_id: ID input for endpoint.
+        :param selections: List of selections from available fields.
+        :param query: Query parameters without the API key.
+        :param ticket: Priority class and deadline of the request. Defaults to those of the current thread.
+        :return: Tuple of the Json-encoded data and the raw response bytes.
+        """
+        import requests
+
+        self.logger.info("Making API request to endpoint: %s with input_id: %s", endpoint, input_id)
+        url = f"{self.base_url}{endpoint}{'/' + str(input_id) if input_id else ''}"
+
+        required_access_level = self.key_pool.required_access_level(endpoint, selections) if self.key_pool else None
+        replaying = self.cassette is not None and self.cassette.replaying
+        key_switches = 0
+        attempt = 0
+        while True:
+            pooled_key = None
+            if self.key_pool is None or replaying:
+                api_key = self.api_key
+                self.circuit_breaker.check(api_key)
+                if not replaying:
+                    self._check_request_limit(ticket)  # Check if request limit is exceeded
+            else:
+                start = time.monotonic()
+                pooled_key = self.key_pool.acquire(required_access_level)
+                self.metrics.record_wait(time.monotonic() - start)
+                api_key = pooled_key.api_key
+                self.circuit_breaker.check(api_key)
+
+            response = None
+            try:
+                start = time.monotonic()
+                response = self._send_request(url, dict(query, key=api_key))
+                self.metrics.record_request(endpoint, time.monotonic() - start, len(response.content))
+                response_data = self.api_error_handler(response)
+            except TornApiError as e:
+                self.metrics.record_error(e.error_code)
+                self.circuit_breaker.record_failure(api_key, e.error_code)
+                # Key-specific errors bench the key, the request is then retried on another key
+                if (pooled_key is not None and self.key_pool.report_error(pooled_key, e.error_code)
+                        and key_switches < len(self.key_pool) - 1):
+                    key_switches += 1
+                    self.logger.warning("Benched key %s after error %s. Retrying with another key...",
+                                        pooled_key, e.error_code)
+                    continue
+                error = e
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                self.metrics.record_error(self._transport_error_code(e))
+                self.circuit_breaker.release(api_key)
+                error = e
+            else:
+                self.circuit_breaker.record_success(api_key)
+                break
+
+            delay = self.retry_policy.get_delay(error, attempt, self._retry_after(response),
+                                                self._rate_limit_wait(pooled_key))
+            if delay is None:
+                raise error
+            attempt += 1
+            self.metrics.record_retry(error.error_code if isinstance(error, TornApiError)
+                                      else self._transport_error_code(error))
+            self.logger.warning("Request failed with %s. Retrying in %.2fs (%s/%s)...",
+                                error, delay, attempt, self.retry_policy.max_retries)
+            if not replaying:
+                time.sleep(delay)
+
+        return response_data, response.content
+
     def get_user(self, user_id: int = None, selections: List[str] = None, limit: int = None, stat: str = None,
                  cat: int = None, log: int = None, from_unix: int = None, to_unix: int = None,
                  unix_timestamp: int = None) -> dict:
@@ -230,7 +715,7 @@ class TornApiWrapper:
         :param unix_timestamp: UNIX timestamp to get specific stat from date.
         :return: Json-encoded Torn City user data.
         """
-        self.logger.info(Fore.MAGENTA + f"Fetching user data for user_id: {user_id}" + Style.RESET_ALL)
+        self.logger.info("Fetching user data for user_id: %s", user_id)
         return self.api_request("/user", user_id, selections, limit, sort=None, stat=stat, cat=cat, log=log,
                                 from_unix=from_unix, to_unix=to_unix, unix_timestamp=unix_timestamp)
 
@@ -242,7 +727,7 @@ class TornApiWrapper:
         :param selections: List of selections from available fields.
         :return: Json-encoded Torn City property data.
         """
-        self.logger.info(Fore.MAGENTA + f"Fetching property data for property_id: {property_id}" + Style.RESET_ALL)
+        self.logger.info("Fetching property data for property_id: %s", property_id)
         return self.api_request("/property", property_id, selections)
 
     def get_faction(self, faction_id: int = None, selections: List[str] = None, limit: int = None, sort: str = None,
@@ -258,7 +743,7 @@ class TornApiWrapper:
         :param to_unix: UNIX timestamps to filter results, including entries on or before this timestamp.
         :return: Json-encoded Torn City faction data.
         """
-        self.logger.info(Fore.MAGENTA + f"Fetching faction data for faction_id: {faction_id}" + Style.RESET_ALL)
+        self.logger.info("Fetching faction data for faction_id: %s", faction_id)
         return self.api_request("/faction", faction_id, selections, limit, sort, stat=None, cat=None, log=None,
                                 from_unix=from_unix, to_unix=to_unix, unix_timestamp=None)
 
@@ -274,7 +759,7 @@ class TornApiWrapper:
         :param to_unix: UNIX timestamps to filter results, including entries on or before this timestamp.
         :return: Json-encoded Torn City company data.
         """
-        self.logger.info(Fore.MAGENTA + f"Fetching company data for company_id: {company_id}" + Style.RESET_ALL)
+        self.logger.info("Fetching company data for company_id: %s", company_id)
         return self.api_request("/company", company_id, selections, limit, sort=None, stat=None, cat=None, log=None,
                                 from_unix=from_unix, to_unix=to_unix, unix_timestamp=None)
 
@@ -286,7 +771,7 @@ class TornApiWrapper:
         :param selections: List of selections from available fields.
         :return: Json-encoded Torn City market data.
         """
-        self.logger.info(Fore.MAGENTA + f"Fetching market data for item_id: {item_id}" + Style.RESET_ALL)
+        self.logger.info("Fetching market data for item_id: %s", item_id)
         return self.api_request("/market", item_id, selections)
 
     def get_torn(self, torn_id: Union[str, int] = None, selections: List[str] = None) -> dict:
@@ -297,7 +782,7 @@ class TornApiWrapper:
         :param selections: List of selections from available fields.
         :return: Json-encoded Torn City data.
         """
-        self.logger.info(Fore.MAGENTA + f"Fetching Torn data for torn_id: {torn_id}" + Style.RESET_ALL)
+        self.logger.info("Fetching Torn data for torn_id: %s", torn_id)
         return self.api_request("/torn", torn_id, selections)
 
     def get_key_info(self) -> dict:
@@ -306,5 +791,222 @@ class TornApiWrapper:
 
         :return: Json-encoded Torn City data.
         """
-        self.logger.info(Fore.MAGENTA + "Fetching API key information" + Style.RESET_ALL)
+        self.logger.info("Fetching API key information")
         return self.api_request("/key", None, ["info"])
+
+    def bulk_request(self, endpoint: str, input_ids: Iterable[int], selections: List[str] = None,
+                     max_workers: int = 8, ordered: bool = False, checkpoint: str = None,
+                     **kwargs) -> Iterator[BulkResult]:
+        """
+        Make the same request for many IDs concurrently, within the request budget.
+
+        :param endpoint: API endpoint.
+        :param input_ids: IDs to fetch.
+        :param selections: List of selections from available fields.
+        :param max_workers: Number of requests in flight at once.
+        :param ordered: Whether to yield results in input order instead of as they complete.
+        :param checkpoint: Optional path to a checkpoint file, so an interrupted run resumes where it stopped.
+        :param kwargs: Further arguments for `api_request`, such as `limit` or `from_unix`.
+            Requests run with the "bulk" priority class.
+        :return: Iterator of `BulkResult`, one per ID. Errors are reported per ID and don't stop the batch.
+        """
+        self.logger.info("Starting bulk fetch on endpoint: %s", endpoint)
+
+        def fetch(input_id: int) -> dict:
+            with self.priority(BULK):
+                return self.api_request(endpoint, input_id, selections, **kwargs)
+
+        fetcher = BulkFetcher(fetch, max_workers=max_workers, ordered=ordered, checkpoint=checkpoint)
+        return fetcher.run(input_ids)
+
+    def get_users(self, user_ids: Iterable[int], selections: List[str] = None, max_workers: int = 8,
+                  ordered: bool = False, checkpoint: str = None) -> Iterator[BulkResult]:
+        """
+        Get Torn City user data for many users.
+
+        :param user_ids: Torn City user IDs.
+        :param selections: List of selections from available fields.
+        :param max_workers: Number of requests in flight at once.
+        :param ordered: Whether to yield results in input order instead of as they complete.
+        :param checkpoint: Optional path to a checkpoint file, so an interrupted run resumes where it stopped.
+        :return: Iterator of `BulkResult`, one per user.
+        """
+        return self.bulk_request("/user", user_ids, selections, max_workers, ordered, checkpoint)
+
+    def get_factions(self, faction_ids: Iterable[int], selections: List[str] = None, max_workers: int = 8,
+                     ordered: bool = False, checkpoint: str = None) -> Iterator[BulkResult]:
+        """
+        Get Torn City faction data for many factions.
+
+        :param faction_ids: Torn City faction IDs.
+        :param selections: List of selections from available fields.
+        :param max_workers: Number of requests in flight at once.
+        :param ordered: Whether to yield results in input order instead of as they complete.
+        :param checkpoint: Optional path to a checkpoint file, so an interrupted run resumes where it stopped.
+        :return: Iterator of `BulkResult`, one per faction.
+        """
+        return self.bulk_request("/faction", faction_ids, selections, max_workers, ordered, checkpoint)
+
+    def get_markets(self, item_ids: Iterable[int], selections: List[str] = None, max_workers: int = 8,
+                    ordered: bool = False, checkpoint: str = None) -> Iterator[BulkResult]:
+        """
+        Get Torn City market data for many items.
+
+        :param item_ids: Torn City item IDs.
+        :param selections: List of selections from available fields.
+        :param max_workers: Number of requests in flight at once.
+        :param ordered: Whether to yield results in input order instead of as they complete.
+        :param checkpoint: Optional path to a checkpoint file, so an interrupted run resumes where it stopped.
+        :return: Iterator of `BulkResult`, one per item.
+        """
+        return self.bulk_request("/market", item_ids, selections, max_workers, ordered, checkpoint)
+
+    def watch_markets(self, item_ids: Iterable[int], interval: float = 60.0, selections: List[str] = None,
+                      max_rate: Optional[float] = None, callbacks: Iterable[Callable[["MarketDelta"], None]] = (),
+                      start: bool = True) -> "MarketWatcher":
+        """
+        Watch the market listings of many items and receive only the listings that were added, removed or changed.
+
+        Deltas are passed to the callbacks and to the iterators returned by `MarketWatcher.deltas()` and
+        `MarketWatcher.adeltas()`. Polls run with the "bulk" priority and bypass the cache, which they refresh for
+        other callers.
+
+        :param item_ids: Torn City item IDs.
+        :param interval: Minimum time in seconds between two polls of the same item.
+        :param selections: Listing selections to watch, defaults to "bazaar" and "itemmarket".
+        :param max_rate: Maximum requests per minute used by the watcher, defaults to half of `request_limit`.
+        :param callbacks: Callables receiving each `MarketDelta`.
+        :param start: Whether to start polling right away.
+        :return: The watcher. Call `stop()` when done.
+        """
+        from .market_watcher import MarketWatcher, DEFAULT_MARKET_SELECTIONS
+
+        def fetch(item_id: int, watched_selections: List[str]) -> dict:
+            # A cached response would hide changes until it expires, so polls only write to the cache
+            with self.priority(BULK):
+                return self._fetch_and_cache("/market", item_id, watched_selections)
+
+        watcher = MarketWatcher(fetch, item_ids, interval, selections or DEFAULT_MARKET_SELECTIONS,
+                                max_rate if max_rate is not None else self.request_limit / 2, callbacks)
+        return watcher.start() if start else watcher
+
+    def subscribe(self, endpoint: str, selections: List[str], callback: Callable[["Subscription", dict], None],
+                  input_id: int = None, min_interval: float = 10.0, max_interval: float = 300.0,
+                  max_rate: Optional[float] = None) -> "Subscription":
+        """
+        Poll selections of an entity as often as they change and receive the response whenever they did.
+
+        Intervals adapt between `min_interval` and `max_interval` to how often the data changed recently, and
+        announced changes such as bar ticks, cooldowns or travel arrivals are polled right after they happen.
+        Subscriptions of the same entity share requests. Polls run with the "bulk" priority and bypass the cache,
+        which they refresh for other callers, and they are skipped while the request budget is used up by other
+        requests. See `subscriptions.SubscriptionEngine`.
+
+        :param endpoint: API endpoint, e.g. "user" or "faction".
+        :param selections: Selections to watch, e.g. ["bars"] or ["chain"].
+        :param callback: Callable receiving the `Subscription` and the response, called on the polling thread.
+        :param input_id: ID input for endpoint, None for the key owner.
+        :param min_interval: Shortest time in seconds between two polls.
+        :param max_interval: Longest time in seconds between two polls.
+        :param max_rate: Maximum requests per minute used by all subscriptions, defaults to half of
+            `request_limit`. Only applies to the first subscription, which starts the polling thread.
+        :return: The subscription. Pass it to `subscriptions.unsubscribe()` to stop polling it.
+        """
+        if self.subscriptions is None:
+            from .subscriptions import SubscriptionEngine
+
+            def request(request_endpoint: str, request_id: Optional[int], request_selections: List[str]) -> dict:
+                # A cached response would hide changes until it expires, so polls only write to the cache
+                with self.priority(BULK):
+                    return self._fetch_and_cache(f"/{request_endpoint}", request_id, request_selections)
+
+            rate = max_rate if max_rate is not None else self.request_limit / 2
+            self.subscriptions = SubscriptionEngine(request, rate, available=lambda: self._request_budget()[0])
+            self.subscriptions.start()
+        return self.subscriptions.subscribe(endpoint, selections, callback, input_id, min_interval, max_interval)
+
+    def _iter_records(self, endpoint: str, input_id: Optional[int], selection: str, records_key: str,
+                      timestamp_field: str, since: Optional[int], until: Optional[int], prefetch: bool,
+                      cat: int = None, log: int = None) -> Iterator[Tuple[str, dict]]:
+        """
+        Page through a time-windowed selection, see `pagination.paginate`.
+        """
+        # Pages are prefetched on another thread, which makes its requests with the caller's priority
+        context = self.scheduler.current() if self.scheduler is not None else None
+
+        def fetch_page(to_unix: Optional[int]) -> dict:
+            # Each page is read once, so caching it would only evict useful entries
+            query = build_request_params(None, [selection], cat=cat, log=log, from_unix=since, to_unix=to_unix,
+                                         comment=self.api_comment)
+            with self.scheduler.restore(context) if context is not None else nullcontext():
+                return self._fetch(endpoint, input_id, [selection], query)[0]
+
+        return paginate(fetch_page, records_key, timestamp_field, since, until, prefetch=prefetch)
+
+    def iter_user_log(self, cat: int = None, log: int = None, since: int = None, until: int = None,
+                      prefetch: bool = True) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over the log of the key owner, newest first, paging through the API automatically.
+
+        :param cat: Filter based on the log categories.
+        :param log: Filter based on the log types.
+        :param since: UNIX timestamp of the oldest entries to include.
+        :param until: UNIX timestamp of the newest entries to include.
+        :param prefetch: Whether to request the next page while the current one is being consumed.
+        :return: Iterator of (log ID, log entry) tuples.
+        """
+        return self._iter_records("/user", None, "log", "log", "timestamp", since, until, prefetch, cat, log)
+
+    def iter_user_attacks(self, since: int = None, until: int = None,
+                          prefetch: bool = True) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over the attacks of the key owner, newest first, paging through the API automatically.
+
+        :param since: UNIX timestamp of the oldest attacks to include.
+        :param until: UNIX timestamp of the newest attacks to include.
+        :param prefetch: Whether to request the next page while the current one is being consumed.
+        :return: Iterator of (attack ID, attack) tuples.
+        """
+        return self._iter_records("/user", None, "attacks", "attacks", "timestamp_started", since, until, prefetch)
+
+    def iter_faction_attacks(self, faction_id: int = None, since: int = None, until: int = None,
+                             prefetch: bool = True) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over the attacks of a faction, newest first, paging through the API automatically.
+
+        :param faction_id: Torn City faction ID, defaults to the key owner's faction.
+        :param since: UNIX timestamp of the oldest attacks to include.
+        :param until: UNIX timestamp of the newest attacks to include.
+        :param prefetch: Whether to request the next page while the current one is being consumed.
+        :return: Iterator of (attack ID, attack) tuples.
+        """
+        return self._iter_records("/faction", faction_id, "attacks", "attacks", "timestamp_started", since, until,
+                                  prefetch)
+
+    def iter_faction_revives(self, faction_id: int = None, since: int = None, until: int = None,
+                             prefetch: bool = True) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over the revives of a faction, newest first, paging through the API automatically.
+
+        :param faction_id: Torn City faction ID, defaults to the key owner's faction.
+        :param since: UNIX timestamp of the oldest revives to include.
+        :param until: UNIX timestamp of the newest revives to include.
+        :param prefetch: Whether to request the next page while the current one is being consumed.
+        :return: Iterator of (revive ID, revive) tuples.
+        """
+        return self._iter_records("/faction", faction_id, "revives", "revives", "timestamp", since, until, prefetch)
+
+    def iter_faction_news(self, news_type: str = "mainnews", faction_id: int = None, since: int = None,
+                          until: int = None, prefetch: bool = True) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over the news of a faction, newest first, paging through the API automatically.
+
+        :param news_type: News selection, e.g. "mainnews", "attacknews", "armorynews" or "fundsnews".
+        :param faction_id: Torn City faction ID, defaults to the key owner's faction.
+        :param since: UNIX timestamp of the oldest news to include.
+        :param until: UNIX timestamp of the newest news to include.
+        :param prefetch: Whether to request the next page while the current one is being consumed.
+        :return: Iterator of (news ID, news entry) tuples.
+        """
+        return self._iter_records("/faction", faction_id, news_type, news_type, "timestamp", since, until,
+                                  prefetch)